@@ -0,0 +1,50 @@
+"""
+Compare le batching à taille fixe et le batching dynamique par budget de tokens.
+
+Usage (depuis le dossier ai-engine) :
+    python -m benchmarks.bench_batching --n 2000
+"""
+import argparse
+import json
+import time
+
+from benchmarks.corpus import generate_reviews
+from src.analyzer import _make_batches, clean_text, load_model, predict_sentiment_batch
+
+def padding_stats(texts: list, batch_size: int, max_tokens: int = None) -> dict:
+    """
+    Tokens réellement calculés (padding inclus) vs tokens utiles.
+    Indépendant du matériel : c'est le gain "théorique" du regroupement par longueur.
+    """
+    cleaned = [clean_text(t) for t in texts]
+    cleaned = [t for t in cleaned if t]
+    lengths = [len(ids) for ids in load_model().tokenizer(cleaned, truncation=True, max_length=512)["input_ids"]]
+    batches = _make_batches(lengths, batch_size, max_tokens)
+    useful = sum(lengths)
+    computed = sum(max(lengths[i] for i in b) * len(b) for b in batches)
+    return {"batches": len(batches), "useful_tokens": useful, "computed_tokens": computed,
+            "padding_ratio": round(1 - useful / computed, 3)}
+
+def run(texts: list, batch_size: int, max_tokens: int = None) -> dict:
+    start = time.perf_counter()
+    predict_sentiment_batch(texts, batch_size=batch_size, max_tokens=max_tokens)
+    duration = time.perf_counter() - start
+    result = {"batch_size": batch_size, "max_tokens": max_tokens,
+              "seconds": round(duration, 3), "reviews_per_sec": round(len(texts) / duration, 1)}
+    result.update(padding_stats(texts, batch_size, max_tokens))
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=2000, help="Nombre d'avis synthétiques")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--max-tokens", type=int, default=4096)
+    args = parser.parse_args()
+
+    texts = generate_reviews(args.n)
+    load_model()
+    baseline = run(texts, args.batch_size)
+    bucketed = run(texts, 256, args.max_tokens)
+    bucketed["speedup"] = round(bucketed["reviews_per_sec"] / baseline["reviews_per_sec"], 2)
+
+    print(json.dumps({"n": args.n, "fixed": baseline, "token_budget": bucketed}, indent=2))
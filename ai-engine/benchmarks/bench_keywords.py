@@ -0,0 +1,43 @@
+"""
+Micro-benchmark de predict_category : ancienne recherche par sous-chaînes
+(4 listes, `any(w in t ...)`) vs regex unique compilée.
+
+Usage (depuis le dossier ai-engine) :
+    python -m benchmarks.bench_keywords --n 100000
+"""
+import argparse
+import json
+import time
+
+from benchmarks.corpus import generate_reviews
+from src.analyzer import CATEGORY_KEYWORDS, predict_category
+
+def legacy_predict_category(text: str) -> str:
+    """
+    Ancienne implémentation (sous-chaînes, une liste après l'autre), gardée comme référence.
+    """
+    if not text: return "AUTRE"
+    t = text.lower()
+    for category, words in CATEGORY_KEYWORDS:
+        if any(w.rstrip('*') in t for w in words): return category
+    return "AUTRE"
+
+def measure(func, texts: list) -> tuple:
+    start = time.perf_counter()
+    results = [func(t) for t in texts]
+    duration = time.perf_counter() - start
+    return results, {"seconds": round(duration, 3), "reviews_per_sec": round(len(texts) / duration)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=100000, help="Nombre d'avis synthétiques")
+    args = parser.parse_args()
+
+    texts = generate_reviews(args.n)
+    legacy, before = measure(legacy_predict_category, texts)
+    compiled, after = measure(predict_category, texts)
+    after["speedup"] = round(after["reviews_per_sec"] / before["reviews_per_sec"], 2)
+
+    agreement = sum(a == b for a, b in zip(legacy, compiled)) / len(texts)
+    print(json.dumps({"n": args.n, "substring": before, "compiled_regex": after,
+                      "agreement": round(agreement, 3)}, indent=2))
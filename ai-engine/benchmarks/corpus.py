@@ -0,0 +1,68 @@
+import random
+
+# Vocabulaire de base pour fabriquer des avis "réalistes" (FR + EN)
+WORDS = [
+    # FR
+    'application', 'super', 'nul', 'bug', 'crash', 'merci', 'lent', 'pub', 'mise', 'à', 'jour',
+    'impossible', 'de', 'se', 'connecter', 'depuis', 'la', 'dernière', 'version', 'très', 'bien',
+    'pratique', 'trop', 'cher', 'abonnement', 'manque', 'une', 'option', 'pour', 'les', 'photos',
+    # EN
+    'app', 'great', 'bad', 'slow', 'love', 'it', 'the', 'keeps', 'crashing', 'after', 'update',
+    'please', 'add', 'dark', 'mode', 'too', 'many', 'ads', 'subscription', 'is', 'expensive', 'works',
+]
+
+# Avis très courts, ultra-fréquents sur le Play Store
+SHORT_REVIEWS = ['ok', 'good', 'nice app', 'super', 'top', 'bien', 'nul', 'great', '👍', 'love it', 'bof']
+
+# Corpus multilingue : vocabulaire et avis courts par langue, avec la part de chaque langue
+LANGUAGES = {
+    'fr': (WORDS[:31], ['super', 'top', 'bien', 'nul', 'bof', 'génial', 'très bien', '👍']),
+    'en': (WORDS[31:], ['ok', 'good', 'nice app', 'great', 'love it', 'bad', 'useless', '👍']),
+    'es': (['aplicación', 'muy', 'buena', 'mala', 'error', 'se', 'cierra', 'después', 'de', 'la',
+            'actualización', 'demasiados', 'anuncios', 'lenta', 'me', 'encanta', 'por', 'favor',
+            'añadir', 'modo', 'oscuro', 'suscripción', 'cara', 'no', 'funciona', 'gracias'],
+           ['excelente', 'muy buena', 'mala', 'genial', '👍', '😡']),
+    'de': (['die', 'app', 'ist', 'sehr', 'gut', 'schlecht', 'stürzt', 'ständig', 'ab', 'seit', 'dem',
+            'update', 'zu', 'viel', 'werbung', 'langsam', 'bitte', 'dunkelmodus', 'hinzufügen',
+            'abo', 'teuer', 'funktioniert', 'nicht', 'mehr', 'danke', 'für'],
+           ['super', 'gut', 'toll', 'schlecht', 'sehr gut', '👍']),
+    'pt': (['aplicativo', 'muito', 'bom', 'ruim', 'trava', 'depois', 'da', 'atualização', 'anúncios',
+            'demais', 'lento', 'adoro', 'por', 'favor', 'adicionar', 'modo', 'escuro', 'assinatura',
+            'cara', 'não', 'funciona', 'mais', 'obrigado', 'o', 'app'],
+           ['ótimo', 'muito bom', 'bom', 'péssimo', 'top', '❤️']),
+}
+LANGUAGE_WEIGHTS = {'en': 0.45, 'fr': 0.25, 'es': 0.12, 'pt': 0.10, 'de': 0.08}
+
+def sample_length(rng: random.Random) -> int:
+    """
+    Longueur (en caractères) d'un avis, selon une distribution proche du Play Store :
+    beaucoup d'avis courts, une longue traîne de "pavés" jusqu'à 3000 caractères.
+    """
+    bucket = rng.random()
+    if bucket < 0.35:
+        return 0  # avis court prédéfini
+    if bucket < 0.90:
+        return min(int(rng.lognormvariate(4.3, 0.7)), 3000)  # ~75 caractères en médiane
+    return rng.randint(500, 3000)
+
+def generate_reviews(n: int, seed: int = 42, multilingual: bool = False) -> list:
+    """
+    Génère `n` avis synthétiques (reproductibles grâce à la graine).
+    multilingual=True : une langue par avis, tirée selon LANGUAGE_WEIGHTS (sinon mélange FR + EN).
+    """
+    rng = random.Random(seed)
+    languages, weights = list(LANGUAGE_WEIGHTS), list(LANGUAGE_WEIGHTS.values())
+    reviews = []
+    for _ in range(n):
+        vocabulary, short_reviews = WORDS, SHORT_REVIEWS
+        if multilingual:
+            vocabulary, short_reviews = LANGUAGES[rng.choices(languages, weights)[0]]
+        length = sample_length(rng)
+        if length == 0:
+            reviews.append(rng.choice(short_reviews))
+            continue
+        words = []
+        while sum(len(w) + 1 for w in words) < length:
+            words.append(rng.choice(vocabulary))
+        reviews.append(" ".join(words))
+    return reviews
@@ -0,0 +1,115 @@
+"""
+Benchmark du chemin critique de l'analyseur : clean_text, predict_category, predict_sentiment.
+
+Chaque étape (et chaque backend pour le sentiment) tourne dans un sous-processus séparé,
+pour que le pic mémoire mesuré (RSS) soit le sien. Résultat en JSON : avis/s,
+latence p50 / p99 par batch, pic RSS. À relancer avant / après toute modification de l'analyseur.
+
+Usage (depuis le dossier ai-engine) :
+    python -m benchmarks.run --tiny --out bench.json
+    python -m benchmarks.run --n 5000 --backends torch,onnx
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import generate_reviews
+
+STAGES = ["clean_text", "predict_category", "predict_sentiment"]
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+def peak_rss_mb() -> float:
+    # ru_maxrss est en Ko sous Linux (en octets sous macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def run_stage(stage: str, texts: list, batch_size: int) -> dict:
+    """
+    Mesure une étape sur `texts`, par batchs de `batch_size` avis (dans le processus courant).
+    """
+    from src import analyzer
+
+    if stage == "predict_sentiment":
+        analyzer.warm_up()  # chargement du modèle hors mesure
+        process = analyzer.predict_sentiment_batch
+    else:
+        func = getattr(analyzer, stage)
+        process = lambda batch: [func(t) for t in batch]
+
+    latencies = []
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        batch_start = time.perf_counter()
+        process(texts[i:i + batch_size])
+        latencies.append(time.perf_counter() - batch_start)
+    duration = time.perf_counter() - start
+
+    return {"stage": stage, "reviews": len(texts), "batch_size": batch_size,
+            "seconds": round(duration, 3), "reviews_per_sec": round(len(texts) / duration, 1),
+            "p50_batch_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p99_batch_ms": round(percentile(latencies, 0.99) * 1000, 2),
+            "peak_rss_mb": peak_rss_mb()}
+
+def spawn_stage(stage: str, args, backend: str = None, env: dict = None) -> dict:
+    """
+    Lance une étape dans un sous-processus (le backend est choisi au chargement du module).
+    """
+    command = [sys.executable, "-m", "benchmarks.run", "--stage", stage, "--n", str(args.n),
+               "--batch-size", str(args.batch_size), "--seed", str(args.seed)]
+    if args.multilingual:
+        command.append("--multilingual")
+    child_env = dict(os.environ, **(env or {}))
+    if backend:
+        child_env["SENTIMENT_BACKEND"] = backend
+    output = subprocess.run(command, env=child_env, check=True, capture_output=True, text=True).stdout
+    # Le chargement du modèle écrit ses logs sur stdout : le JSON est la dernière ligne
+    result = json.loads(output.strip().splitlines()[-1])
+    if backend:
+        result["backend"] = backend
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=2000, help="Nombre d'avis synthétiques")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--multilingual", action=argparse.BooleanOptionalAction, default=True,
+                        help="Corpus FR/EN/ES/PT/DE (sinon mélange FR + EN)")
+    parser.add_argument("--backends", default="torch", help="Backends du sentiment, séparés par des virgules")
+    parser.add_argument("--tiny", action="store_true", help="Petit modèle aléatoire local (hors-ligne, sans téléchargement)")
+    parser.add_argument("--out", help="Fichier JSON de sortie (sinon stdout)")
+    parser.add_argument("--stage", choices=STAGES, help=argparse.SUPPRESS)  # usage interne (sous-processus)
+    args = parser.parse_args()
+
+    texts = generate_reviews(args.n, args.seed, multilingual=args.multilingual)
+
+    if args.stage:
+        print(json.dumps(run_stage(args.stage, texts, args.batch_size)))
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        env = {}
+        if args.tiny:
+            # Sous-processus : ru_maxrss survit au fork + exec, le parent doit rester léger
+            subprocess.run([sys.executable, "-m", "benchmarks.tiny_model", os.path.join(workdir, "tiny")],
+                           check=True, capture_output=True)
+            env = {"MODEL_DIR": os.path.join(workdir, "tiny"),
+                   "ONNX_MODEL_PATH": os.path.join(workdir, "tiny.onnx")}
+
+        results = [spawn_stage(stage, args) for stage in STAGES[:2]]
+        results += [spawn_stage("predict_sentiment", args, backend, env) for backend in args.backends.split(",")]
+
+    report = json.dumps({"n": args.n, "seed": args.seed, "multilingual": args.multilingual,
+                         "tiny_model": args.tiny, "results": results}, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(report)
+    print(report)
@@ -0,0 +1,48 @@
+"""
+Petit modèle BERT aléatoire (même format que le vrai), pour lancer les benchmarks hors-ligne
+sans télécharger les ~700 Mo du modèle de production.
+
+Les chiffres absolus ne valent rien (2 couches au lieu de 12) : ils servent à comparer
+deux versions du code entre elles, pas à dimensionner la prod.
+
+Usage (depuis le dossier ai-engine) :
+    python -m benchmarks.tiny_model models/tiny
+"""
+import argparse
+import os
+
+from benchmarks.corpus import LANGUAGES
+
+SPECIAL_TOKENS = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+LETTERS = "abcdefghijklmnopqrstuvwxyzàâäçéèêëîïñôöùûüßãõáíóú"
+
+def build_tiny_model(path: str, seed: int = 0):
+    """
+    Écrit dans `path` un tokenizer + un BertForSequenceClassification à 5 classes ("1 star" ... "5 stars").
+    """
+    import torch
+    from transformers import BertConfig, BertForSequenceClassification, BertTokenizerFast
+
+    words = sorted({w for vocabulary, _ in LANGUAGES.values() for w in vocabulary})
+    vocab = SPECIAL_TOKENS + words + list(LETTERS) + ["##" + c for c in LETTERS]
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, "vocab.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(vocab))
+
+    labels = {i: f"{i + 1} star" + ("s" if i else "") for i in range(5)}
+    config = BertConfig(vocab_size=len(vocab), hidden_size=64, num_hidden_layers=2, num_attention_heads=2,
+                        intermediate_size=128, num_labels=5, id2label=labels,
+                        label2id={label: i for i, label in labels.items()},
+                        # Poids très dispersés : sinon le modèle prédit toujours la même classe
+                        initializer_range=2.0)
+    torch.manual_seed(seed)
+    BertForSequenceClassification(config).save_pretrained(path)
+    BertTokenizerFast(vocab_file=os.path.join(path, "vocab.txt"), do_lower_case=True,
+                      strip_accents=False).save_pretrained(path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path", nargs="?", default="models/tiny")
+    args = parser.parse_args()
+    build_tiny_model(args.path)
+    print(f"✅ Modèle de test écrit dans {args.path}")
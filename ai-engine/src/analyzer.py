@@ -1,13 +1,230 @@
+import configparser
+import functools
+import hashlib
+import os
 import re
-from transformers import pipeline
-
-print("🧠 [AI Loading] Chargement du modèle neuronal (BERT)...")
+import threading
+import time
+import unicodedata
+from collections import namedtuple
 
 # Modèle multilingue spécialisé dans les avis (1-5 étoiles)
 # Il comprend le Français, l'Anglais, l'Espagnol, l'Allemand, etc.
-sentiment_pipeline = pipeline("sentiment-analysis", model="nlptown/bert-base-multilingual-uncased-sentiment")
+MODEL_NAME = "nlptown/bert-base-multilingual-uncased-sentiment"
+
+# Révision du modèle sur le Hub (tag ou hash de commit). Résolue en hash de commit au téléchargement
+# (voir download_model) : la copie locale est ensuite figée, quelle que soit l'évolution de "main".
+MODEL_REVISION = os.getenv("MODEL_REVISION", "main")
+
+# Copie locale du modèle : chargée hors-ligne (aucun appel au Hub). Téléchargée au premier lancement.
+MODEL_DIR = os.getenv("MODEL_DIR", "models/sentiment")
+
+# Moteur d'inférence : "torch" (fp32), "torch-int8" ou "onnx" (voir src/backends.py)
+SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "torch")
+
+# Fichiers qui déterminent les scores (configuration, poids, vocabulaire)
+MODEL_FILES = ("config.json", "model.safetensors", "pytorch_model.bin", "tokenizer.json", "vocab.txt")
+
+# Empreintes déjà calculées dans ce process ({(dossier, tailles et dates des fichiers): empreinte})
+_FINGERPRINTS = {}
+
+def model_fingerprint(path: str = None) -> str:
+    """
+    Empreinte (sha1) de la copie locale du modèle : change avec le modèle, la révision ou MODEL_DIR.
+    Calculée au téléchargement et mémorisée dans `path`/.fingerprint (recalculée seulement si un
+    fichier change de taille ou de date). Jamais calculée à l'import : voir analysis_versions.
+    Avant le premier téléchargement : "rev-<MODEL_REVISION>" (les avis de ce premier lancement
+    seront ré-analysés une fois par le backfill).
+    """
+    path = path or MODEL_DIR
+    files = [os.path.join(path, name) for name in MODEL_FILES if os.path.exists(os.path.join(path, name))]
+    if not files:
+        return f"rev-{MODEL_REVISION}"
+
+    stamp = ";".join(f"{os.path.basename(f)}:{os.path.getsize(f)}:{int(os.path.getmtime(f))}" for f in files)
+    if (path, stamp) in _FINGERPRINTS:
+        return _FINGERPRINTS[(path, stamp)]
+
+    cache_path = os.path.join(path, ".fingerprint")
+    try:
+        with open(cache_path) as f:
+            saved_stamp, saved = f.read().split("\n")[:2]
+        if saved_stamp == stamp:
+            _FINGERPRINTS[(path, stamp)] = saved
+            return saved
+    except (OSError, ValueError):
+        pass
+
+    print(f"🔏 [AI Loading] Calcul de l'empreinte du modèle ({path})...")
+    digest = hashlib.sha1()
+    for name in files:
+        with open(name, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    fingerprint = digest.hexdigest()[:12]
+    try:
+        with open(cache_path, "w") as f:
+            f.write(f"{stamp}\n{fingerprint}")
+    except OSError:
+        # Dossier en lecture seule : lancer `python -m src.analyzer --download` à la construction de l'image
+        print(f"⚠️ [AI Loading] Empreinte non enregistrée dans {cache_path} (recalculée à chaque lancement).")
+    _FINGERPRINTS[(path, stamp)] = fingerprint
+    return fingerprint
+
+# Mots-clés des catégories (ordre du fichier = priorité)
+KEYWORDS_FILE = os.getenv("KEYWORDS_FILE", os.path.join(os.path.dirname(__file__), "..", "config", "keywords.ini"))
+
+# Cascade : les avis triviaux (emojis seuls, 1 à 3 mots connus) sont notés par un lexique,
+# sans BERT. CASCADE_USE_RATING : la note étoilée doit confirmer le lexique.
+CASCADE_ENABLED = os.getenv("CASCADE_ENABLED", "true").lower() == "true"
+CASCADE_MAX_WORDS = int(os.getenv("CASCADE_MAX_WORDS", 3))
+CASCADE_MAX_CHARS = int(os.getenv("CASCADE_MAX_CHARS", 60))
+CASCADE_USE_RATING = os.getenv("CASCADE_USE_RATING", "true").lower() == "true"
+LEXICON_FILE = os.getenv("LEXICON_FILE", os.path.join(os.path.dirname(__file__), "..", "config", "lexicon.ini"))
 
-print("✅ [AI Ready] Modèle chargé.")
+def _file_version(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()[:8]
+
+def model_version() -> str:
+    """
+    Version du modèle (sert de clé de cache : changer de modèle invalide le cache).
+    """
+    return os.getenv("MODEL_VERSION") or f"{MODEL_NAME}@{model_fingerprint()}:{SENTIMENT_BACKEND}"
+
+def _cascade_version() -> str:
+    # Réglages de la cascade : ils décident quels avis échappent au modèle
+    if not CASCADE_ENABLED: return "off"
+    rating = "rating" if CASCADE_USE_RATING else "norating"
+    return f"{CASCADE_MAX_WORDS}w{CASCADE_MAX_CHARS}c-{rating}"
+
+def analyzer_version() -> str:
+    """
+    Version complète de l'analyse (modèle + mots-clés + lexique + réglages de la cascade), enregistrée
+    avec chaque avis dans reviews.model_version : un avis d'une autre version est "périmé" (voir src/backfill.py).
+    """
+    return os.getenv("ANALYZER_VERSION") or (
+        f"{model_version()}|kw-{_file_version(KEYWORDS_FILE)}|lex-{_file_version(LEXICON_FILE)}"
+        f"|cascade-{_cascade_version()}"
+    )
+
+# Versions d'un process, résolues une fois le modèle en place (après warm_up / load_weights) :
+# avant le téléchargement, l'empreinte ne serait que "rev-<MODEL_REVISION>"
+AnalysisVersions = namedtuple("AnalysisVersions", ["model", "analyzer"])
+
+def analysis_versions() -> AnalysisVersions:
+    """
+    (version du modèle, version de l'analyse), à passer au scoring (cache, write-back, backfill).
+    """
+    return AnalysisVersions(model_version(), analyzer_version())
+
+# Le modèle n'est chargé qu'au premier besoin (ou par warm_up()) : importer ce module
+# pour clean_text / predict_category ne coûte rien.
+SentimentModel = namedtuple("SentimentModel", ["tokenizer", "config", "forward"])
+_model = None
+_weights = None
+_model_lock = threading.RLock()
+
+# Durées (secondes) des étapes du démarrage, pour suivre le "cold start" des workers
+STARTUP_TIMINGS = {}
+
+def _lap(step: str, start: float) -> float:
+    now = time.perf_counter()
+    STARTUP_TIMINGS[step] = round(now - start, 2)
+    return now
+
+def download_model(path: str = MODEL_DIR):
+    """
+    Télécharge le modèle depuis le Hub (révision MODEL_REVISION) dans `path`.
+    """
+    from huggingface_hub import HfApi
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    # Branche / tag -> hash de commit : tokenizer et poids viennent du même commit
+    revision = HfApi().model_info(MODEL_NAME, revision=MODEL_REVISION).sha
+    print(f"📥 [AI Loading] Téléchargement de {MODEL_NAME}@{revision} vers {path}...")
+    AutoTokenizer.from_pretrained(MODEL_NAME, revision=revision).save_pretrained(path)
+    AutoModelForSequenceClassification.from_pretrained(MODEL_NAME, revision=revision).save_pretrained(path)
+    # Empreinte calculée une fois pour toutes ici, et non à chaque lancement
+    model_fingerprint(path)
+    print(f"📌 [AI Loading] Pour retélécharger exactement ce modèle : MODEL_REVISION={revision}")
+
+def load_torch_model():
+    """
+    Modèle PyTorch fp32, lu depuis la copie locale.
+    """
+    from transformers import AutoModelForSequenceClassification
+    return AutoModelForSequenceClassification.from_pretrained(MODEL_DIR, local_files_only=True)
+
+def load_weights() -> tuple:
+    """
+    (tokenizer, config, modèle PyTorch), chargés une seule fois par process, sans construire le moteur
+    d'inférence : à appeler avant un fork pour partager les poids en copy-on-write. Le moteur
+    (session onnxruntime, threads PyTorch) ne survit pas à un fork : chaque worker construit le sien.
+    Le modèle PyTorch vaut None si le backend ONNX a déjà son export.
+    """
+    global _weights
+    if _weights is None:
+        with _model_lock:
+            if _weights is None:
+                print("🧠 [AI Loading] Chargement du modèle neuronal (BERT)...")
+                start = time.perf_counter()
+                from transformers import AutoConfig, AutoTokenizer
+                start = _lap("import", start)
+
+                if not os.path.exists(os.path.join(MODEL_DIR, "config.json")):
+                    download_model(MODEL_DIR)
+                    start = _lap("download", start)
+
+                # Après le téléchargement : le nom de l'export ONNX dépend de l'empreinte du modèle
+                from src.backends import ONNX_MODEL_PATH, export_onnx
+
+                tokenizer = AutoTokenizer.from_pretrained(MODEL_DIR, local_files_only=True)
+                config = AutoConfig.from_pretrained(MODEL_DIR, local_files_only=True)
+                # Le backend ONNX n'a besoin des poids PyTorch que pour l'export initial
+                model = None
+                if SENTIMENT_BACKEND != "onnx" or not os.path.exists(ONNX_MODEL_PATH):
+                    model = load_torch_model()
+                if SENTIMENT_BACKEND == "onnx" and model is not None:
+                    export_onnx(model, tokenizer, ONNX_MODEL_PATH)
+                    model = None
+                _lap("load", start)
+                _weights = (tokenizer, config, model)
+    return _weights
+
+def _load_model() -> SentimentModel:
+    tokenizer, config, model = load_weights()
+
+    from src.backends import build_forward
+    start = time.perf_counter()
+    forward = build_forward(SENTIMENT_BACKEND, model, tokenizer)
+    _lap("backend", start)
+
+    details = ", ".join(f"{step} {seconds}s" for step, seconds in STARTUP_TIMINGS.items())
+    print(f"✅ [AI Ready] Modèle chargé ({details}).")
+    return SentimentModel(tokenizer, config, forward)
+
+def load_model() -> SentimentModel:
+    """
+    Renvoie le modèle de sentiment, chargé une seule fois par process (thread-safe).
+    """
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = _load_model()
+    return _model
+
+def warm_up():
+    """
+    Charge le modèle et fait une première inférence : à appeler au démarrage d'un worker
+    (après le fork, voir load_weights) plutôt que de payer ce coût sur le premier lot.
+    """
+    load_model()
+    start = time.perf_counter()
+    predict_sentiment_batch(["warm up"])
+    STARTUP_TIMINGS["warm_up"] = round(time.perf_counter() - start, 2)
+    print(f"⏱️ [AI Ready] Démarrage : {sum(STARTUP_TIMINGS.values()):.1f}s {STARTUP_TIMINGS}")
 
 def clean_text(text: str) -> str:
     """
@@ -33,77 +250,278 @@ def predict_sentiment(text: str) -> float:
     """
     Analyse le sentiment et retourne un score normalisé (-1.0 à +1.0).
     """
-    if not text or len(text) < 2: return 0.0
-    
-    # 1. Nettoyage
-    cleaned_text = clean_text(text)
-    
     try:
-        # 2. Inférence (Limite technique BERT : 512 tokens)
-        short_text = cleaned_text[:512]
-        
-        result = sentiment_pipeline(short_text)[0]
-        # Le résultat ressemble à : {'label': '4 stars', 'score': 0.85}
-        
-        stars = int(result['label'].split(' ')[0])
-        
-        # 3. Normalisation
-        # 1 star -> -1.0
-        # 3 stars -> 0.0
-        # 5 stars -> +1.0
-        return (stars - 3) / 2.0
-        
+        return predict_sentiment_batch([text])[0]
     except Exception as e:
-        # En cas d'erreur (texte vide après nettoyage, etc.), on retourne Neutre
+        # En cas d'erreur, on retourne Neutre
         return 0.0
 
+def load_lexicon(path: str = LEXICON_FILE) -> tuple:
+    """
+    Lit le lexique de la cascade : (mots -> score, emojis -> score, mots neutres, négations).
+    """
+    parser = configparser.ConfigParser(interpolation=None)
+    with open(path, encoding="utf-8") as f:
+        parser.read_file(f)
+
+    def word_set(section: str) -> set:
+        return {w.strip() for w in parser[section]['words'].split(',') if w.strip()}
+
+    words = {word: float(score) for word, score in parser['WORDS'].items()}
+    emojis = {emoji: float(score) for emoji, score in parser['EMOJIS'].items()}
+    return words, emojis, word_set('FILLERS'), word_set('NEGATIONS')
+
+LEXICON_WORDS, LEXICON_EMOJIS, LEXICON_FILLERS, LEXICON_NEGATIONS = load_lexicon()
+
+def quick_sentiment(text: str, rating: int = None):
+    """
+    Étage "rapide" de la cascade : note sans BERT les avis triviaux
+    (emojis seuls, ou au plus CASCADE_MAX_WORDS mots tous connus du lexique,
+    dans un texte d'au plus CASCADE_MAX_CHARS caractères).
+    Retourne None si l'avis est ambigu : il doit alors passer par le modèle.
+    """
+    if not text: return 0.0
+    if len(text) > CASCADE_MAX_CHARS: return None
+
+    polarities = []
+    for char in text:
+        if char in LEXICON_EMOJIS:
+            polarities.append(LEXICON_EMOJIS[char])
+        elif unicodedata.category(char) == 'So':
+            return None  # Emoji inconnu : ambigu
+
+    if not polarities and len(text) < 2: return 0.0  # Même résultat que le modèle : Neutre
+
+    words = clean_text(text).split()
+    if len(words) > CASCADE_MAX_WORDS: return None
+
+    for word in words:
+        if word in LEXICON_NEGATIONS: return None  # "pas terrible", "not bad" : au modèle
+        if word in LEXICON_FILLERS: continue
+        if word not in LEXICON_WORDS: return None  # Mot inconnu : ambigu
+        polarities.append(LEXICON_WORDS[word])
+
+    # Rien de connu, ou signaux contradictoires ("super 👎") : au modèle
+    if not polarities or (max(polarities) > 0 and min(polarities) < 0) or max(map(abs, polarities)) == 0:
+        return None
+    score = sum(polarities) / len(polarities)
+
+    if CASCADE_USE_RATING and rating is not None:
+        # La note étoilée doit aller dans le même sens que le lexique (sinon : ironie, erreur...)
+        rating_score = (rating - 3) / 2.0
+        return rating_score if rating_score * score > 0 else None
+    return score
+
+def quick_sentiment_batch(texts: list, ratings: list = None) -> list:
+    """
+    Applique l'étage rapide à un lot : score, ou None pour les avis à envoyer au modèle.
+    """
+    if not CASCADE_ENABLED:
+        return [None] * len(texts)
+    ratings = ratings or [None] * len(texts)
+    return [quick_sentiment(text, rating) for text, rating in zip(texts, ratings)]
+
+def _make_batches(lengths: list, batch_size: int, max_tokens: int = None) -> list:
+    """
+    Découpe les indices des textes en lots.
+    - Sans max_tokens : lots de `batch_size` avis, dans l'ordre d'origine.
+    - Avec max_tokens : les avis sont triés par longueur (en tokens) et un lot est
+      fermé dès que (longueur du plus long) x (nombre d'avis) dépasserait le budget.
+      Les avis courts voyagent ensemble et le padding devient quasi nul.
+    """
+    order = list(range(len(lengths)))
+    if not max_tokens:
+        return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+    order.sort(key=lambda i: lengths[i])
+    batches, current = [], []
+    for i in order:
+        # Tri croissant : l'avis courant est toujours le plus long du lot
+        if current and (len(current) >= batch_size or lengths[i] * (len(current) + 1) > max_tokens):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+def predict_sentiment_batch(texts: list, batch_size: int = 32, max_tokens: int = None, forward=None) -> list:
+    """
+    Version "par lot" de predict_sentiment : une seule passe BERT par lot
+    au lieu d'une passe par avis.
+    Si `max_tokens` est fourni, les lots sont construits par budget de tokens
+    (avis regroupés par longueur) plutôt que par nombre fixe d'avis.
+    `forward` permet de forcer un moteur d'inférence (par défaut : SENTIMENT_BACKEND).
+    Retourne la liste des scores (-1.0 à +1.0) dans le même ordre que `texts`.
+    """
+    scores = [0.0] * len(texts)
+
+    # 1. Nettoyage (les textes trop courts ou vides restent Neutres)
+    pending = []
+    for i, text in enumerate(texts):
+        if not text or len(text) < 2: continue
+        cleaned_text = clean_text(text)
+        if cleaned_text:
+            pending.append((i, cleaned_text))
+
+    if not pending:
+        return scores
+
+    model = load_model()
+    forward = forward or model.forward
+    tokenizer = model.tokenizer
+    id2label = model.config.id2label
+
+    # 2. Tokenisation unique, sans padding (limite BERT de 512 tokens)
+    encodings = tokenizer([t for _, t in pending], truncation=True, max_length=512)
+    input_ids = encodings["input_ids"]
+
+    for batch in _make_batches([len(ids) for ids in input_ids], batch_size, max_tokens):
+        # 3. Padding au plus long du lot seulement
+        inputs = tokenizer.pad(
+            {key: [encodings[key][j] for j in batch] for key in encodings.keys()},
+            padding=True,
+            return_tensors="pt"
+        )
+
+        # 4. Inférence : une seule passe avant pour tout le lot
+        logits = forward(dict(inputs))
+
+        # 5. Normalisation (label '4 stars' -> +0.5), remise dans l'ordre d'origine
+        for j, label_id in zip(batch, logits.argmax(axis=-1).tolist()):
+            stars = int(id2label[label_id].split(' ')[0])
+            scores[pending[j][0]] = (stars - 3) / 2.0
+
+    return scores
+
+_ACCENTS = re.compile(r'[\u0300-\u036f]')
+
+def fold_text(text: str) -> str:
+    """
+    Minuscules + suppression des accents ("Écran" -> "ecran").
+    """
+    text = text.lower()
+    if text.isascii(): return text
+    return _ACCENTS.sub('', unicodedata.normalize('NFKD', text))
+
+# Variantes accentuées de chaque lettre ("e" -> "eèéêë...") : la regex accepte les accents
+# directement, ce qui évite de "replier" chaque avis en entier avant la recherche.
+def _letter_variants() -> dict:
+    variants = {}
+    for code in range(0xC0, 0x250):  # Latin-1 + Latin étendu
+        char = chr(code)
+        base = fold_text(char)
+        if char.islower() and len(base) == 1 and base.isascii():
+            variants[base] = variants.get(base, base) + char
+    return variants
+
+_LETTER_VARIANTS = _letter_variants()
+
+def load_keywords(path: str = KEYWORDS_FILE) -> list:
+    """
+    Lit le fichier de mots-clés : [(catégorie, [mots...]), ...] dans l'ordre de priorité.
+    """
+    parser = configparser.ConfigParser(interpolation=None)
+    with open(path, encoding="utf-8") as f:
+        parser.read_file(f)
+    return [
+        (category, [w.strip() for value in parser[category].values() for w in value.split(',') if w.strip()])
+        for category in parser.sections()
+    ]
+
+def _trie_pattern(words) -> str:
+    r"""
+    Regex en arbre de préfixes : "crash*", "cher", "chere" -> "c(?:h[eé...]r(?:[eé...])?|rash\w*)".
+    Le moteur de regex ne teste ainsi qu'une branche par lettre au lieu de chaque mot.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}  # fin de mot
+
+    def build(node: dict) -> str:
+        alternatives = []
+        for char, child in sorted(node.items()):
+            if not char: continue
+            if char == '*':
+                token = r'\w*'
+            elif char == ' ':
+                token = r'\s+'
+            elif char in _LETTER_VARIANTS:
+                token = f'[{_LETTER_VARIANTS[char]}]'
+            else:
+                token = re.escape(char)
+            alternatives.append(token + build(child))
+        if not alternatives: return ''
+        body = alternatives[0] if len(alternatives) == 1 else '(?:' + '|'.join(alternatives) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+def compile_keywords(categories: list) -> tuple:
+    """
+    Compile tous les mots-clés en une seule regex (mots entiers, accents ignorés).
+    Renvoie (regex, priorités) : priorités associe chaque mot-clé à l'index de sa catégorie.
+    """
+    priorities = {}
+    for index, (_, words) in enumerate(categories):
+        for word in words:
+            # Un mot présent dans deux catégories garde la plus prioritaire
+            priorities.setdefault(' '.join(fold_text(word).split()), index)
+    # (?<!\w) plutôt que \b en tête : la regex commence alors par une lettre et le moteur
+    # saute directement les positions qui ne peuvent pas démarrer un mot-clé
+    return re.compile(r'(?<!\w)(?:' + _trie_pattern(priorities) + r')\b'), priorities
+
+CATEGORY_KEYWORDS = load_keywords()
+_CATEGORY_NAMES = [category for category, _ in CATEGORY_KEYWORDS]
+_CATEGORY_PATTERN, _KEYWORD_PRIORITIES = compile_keywords(CATEGORY_KEYWORDS)
+_PREFIX_LENGTHS = sorted({len(w) - 1 for w in _KEYWORD_PRIORITIES if w.endswith('*')})
+
+@functools.lru_cache(maxsize=8192)
+def _keyword_priority(matched: str):
+    """
+    Retrouve la catégorie d'un mot trouvé par la regex (mot exact ou dérivé d'un "mot*").
+    None si le mot ne correspond à aucun mot-clé une fois replié (ex: lettre accentuée dont
+    la forme repliée n'est pas celle de la regex) : le mot est alors ignoré.
+    """
+    matched = ' '.join(fold_text(matched).split())
+    candidates = [_KEYWORD_PRIORITIES.get(matched)]
+    candidates += [_KEYWORD_PRIORITIES.get(matched[:n] + '*') for n in _PREFIX_LENGTHS if n <= len(matched)]
+    return min((c for c in candidates if c is not None), default=None)
+
 def predict_category(text: str) -> str:
     """
     Catégorisation par mots-clés (Support Bilingue FR + EN).
+    Renvoie la catégorie la plus prioritaire trouvée dans le texte (voir config/keywords.ini).
     """
     if not text: return "AUTRE"
-    
+
     # On travaille sur le texte brut (juste en minuscule) pour garder le contexte
-    t = text.lower()
-    
-    # 1. Problèmes Techniques / Technical Issues
-    tech_keywords = [
-        # FR
-        'bug', 'crash', 'écran noir', 'ferme', 'connexion', 'marche pas', 
-        'erreur', 'impossible', 'lent', 'plantage', 'ouvrir',
-        # EN
-        'fix', 'slow', 'lag', 'freeze', 'close', 'open', 'error', 
-        'working', 'glitch', 'connect', 'broken'
-    ]
-    if any(w in t for w in tech_keywords): return "BUG_TECHNIQUE"
-    
-    # 2. Monétisation & Pubs / Pricing & Ads
-    money_keywords = [
-        # FR
-        'pub', 'publicité', 'payant', 'cher', 'argent', 'abonnement', 
-        'remboursement', 'arnaque', 'premium',
-        # EN
-        'ads', 'ad', 'money', 'pay', 'expensive', 'subscription', 
-        'refund', 'scam', 'cost', 'buy'
-    ]
-    if any(w in t for w in money_keywords): return "PRICING_ADS"
-    
-    # 3. Fonctionnalités / Features
-    feature_keywords = [
-        # FR
-        'ajouter', 'manque', 'faudrait', 'option', 'mise à jour', 'système',
-        # EN
-        'add', 'missing', 'need', 'should', 'feature', 'update', 'option'
-    ]
-    if any(w in t for w in feature_keywords): return "FEATURE_REQUEST"
-    
-    # 4. Satisfaction
-    satisfaction_keywords = [
-        # FR
-        'bravo', 'merci', 'top', 'super', 'génial', 'parfait', 'utile', 'cool',
-        # EN
-        'great', 'good', 'love', 'amazing', 'best', 'perfect', 'thanks', 'useful', 'nice'
-    ]
-    if any(w in t for w in satisfaction_keywords): return "SATISFACTION"
-    
-    return "AUTRE"
\ No newline at end of file
+    text = text.lower()
+    # La regex attend des lettres accentuées précomposées ("é" et non "e" + accent combinant)
+    if not text.isascii() and not unicodedata.is_normalized('NFC', text):
+        text = unicodedata.normalize('NFC', text)
+
+    best = None
+    for match in _CATEGORY_PATTERN.finditer(text):
+        priority = _keyword_priority(match.group())
+        if priority is None: continue
+        if best is None or priority < best:
+            best = priority
+            if best == 0: break  # Rien ne peut être plus prioritaire
+
+    return _CATEGORY_NAMES[best] if best is not None else "AUTRE"
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Préparation du modèle de sentiment.")
+    parser.add_argument("--download", action="store_true",
+                        help=f"(Re)télécharger le modèle dans {MODEL_DIR} (révision MODEL_REVISION)")
+    args = parser.parse_args()
+
+    if args.download:
+        download_model(MODEL_DIR)
+    warm_up()
@@ -0,0 +1,96 @@
+import os
+import time
+import numpy as np
+import torch
+from src.analyzer import model_fingerprint
+
+# Moteurs d'inférence disponibles pour le modèle de sentiment :
+# - "torch"      : PyTorch pleine précision (fp32), comportement historique
+# - "torch-int8" : PyTorch avec quantification dynamique int8 des couches Linear
+# - "onnx"       : modèle exporté en ONNX, exécuté par onnxruntime
+BACKENDS = ("torch", "torch-int8", "onnx")
+
+# Nombre de threads de calcul (intra-op). Par défaut : tous les coeurs.
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", os.cpu_count() or 1))
+
+# Emplacement du modèle ONNX (exporté automatiquement au premier lancement). Par défaut, nommé
+# d'après l'empreinte du modèle : un nouveau modèle est ré-exporté au lieu de réutiliser l'ancien export.
+ONNX_MODEL_PATH = os.getenv("ONNX_MODEL_PATH", f"models/sentiment-{model_fingerprint()}.onnx")
+
+def _torch_forward(model):
+    """
+    Renvoie une fonction : entrées tokenisées (tensors) -> logits (numpy).
+    """
+    model.eval()
+    torch.set_num_threads(INFERENCE_THREADS)
+
+    def forward(inputs: dict) -> np.ndarray:
+        with torch.no_grad():
+            return model(**inputs).logits.numpy()
+
+    return forward
+
+def export_onnx(model, tokenizer, path: str = ONNX_MODEL_PATH):
+    """
+    Exporte le modèle PyTorch en ONNX (axes batch/séquence dynamiques).
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    sample = tokenizer(["export onnx"], return_tensors="pt")
+    # Les entrées sont passées dans l'ordre de la signature de forward() (BERT)
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    model.eval()
+    torch.onnx.export(
+        model,
+        tuple(sample[n] for n in input_names),
+        path,
+        input_names=input_names,
+        output_names=["logits"],
+        dynamic_axes=dynamic_axes,
+        opset_version=14,
+        dynamo=False
+    )
+    print(f"📦 [AI Backend] Modèle exporté en ONNX : {path}")
+
+def _onnx_forward(model, tokenizer, path: str = ONNX_MODEL_PATH):
+    import onnxruntime as ort
+
+    # `model` (PyTorch) ne sert qu'à l'export initial : il peut être None si le fichier existe
+    if not os.path.exists(path):
+        export_onnx(model, tokenizer, path)
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = INFERENCE_THREADS
+    options.inter_op_num_threads = 1
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+    input_names = [i.name for i in session.get_inputs()]
+
+    def forward(inputs: dict) -> np.ndarray:
+        feed = {name: inputs[name].numpy().astype(np.int64) for name in input_names}
+        return session.run(["logits"], feed)[0]
+
+    return forward
+
+def build_forward(backend: str, model, tokenizer):
+    """
+    Prépare le moteur d'inférence demandé à partir du modèle PyTorch fp32.
+    Renvoie une fonction : entrées tokenisées (tensors) -> logits (numpy).
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend inconnu '{backend}' (choix : {', '.join(BACKENDS)})")
+
+    start = time.perf_counter()
+    if backend == "torch":
+        forward = _torch_forward(model)
+    elif backend == "torch-int8":
+        quantized = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        forward = _torch_forward(quantized)
+    else:
+        forward = _onnx_forward(model, tokenizer)
+
+    print(f"⚙️ [AI Backend] '{backend}' prêt en {time.perf_counter() - start:.1f}s ({INFERENCE_THREADS} threads).")
+    return forward
@@ -0,0 +1,108 @@
+"""
+Re-analyse (backfill) des avis produits par une ancienne version de l'analyse.
+
+Après un changement de modèle, de backend, de mots-clés ou de lexique, la version de l'analyse change :
+les avis déjà traités avec une autre version sont ré-analysés par paquets, dans l'ordre des id.
+
+- Priorité aux nouveaux avis : avant chaque paquet, la file des avis non traités est vidée.
+- Bridé : pause entre deux paquets pour ne pas monopoliser la base ni le CPU.
+- Reprise : le dernier id traité est enregistré (table backfill_progress) après chaque paquet.
+- Doublons : seuls les avis originaux passent par le modèle, leurs copies suivent (voir score_duplicates).
+
+Usage (depuis le dossier ai-engine) :
+    python -m src.backfill --chunk 1000 --pause 1
+"""
+import argparse
+import time
+from sqlalchemy import or_
+from src.analyzer import AnalysisVersions, analysis_versions, warm_up
+from src.db import SessionLocal, Review, BackfillProgress, bulk_update_results, init_tables
+from src.main import WRITE_BATCH_SIZE, process_reviews, score_batch, score_duplicates
+
+def load_progress(db, analyzer_version: str) -> int:
+    progress = db.get(BackfillProgress, analyzer_version)
+    return progress.last_review_id if progress else 0
+
+def save_progress(db, analyzer_version: str, last_review_id: int):
+    progress = db.get(BackfillProgress, analyzer_version)
+    if progress:
+        progress.last_review_id = last_review_id
+    else:
+        db.add(BackfillProgress(analyzer_version=analyzer_version, last_review_id=last_review_id))
+
+def backfill_chunk(versions: AnalysisVersions, after_id: int, chunk_size: int):
+    """
+    Ré-analyse le prochain paquet d'avis périmés (id > after_id).
+    Renvoie (dernier id vu, nb d'avis ré-analysés), ou (None, 0) s'il n'en reste plus.
+    """
+    db = SessionLocal()
+    try:
+        reviews = db.query(Review.id, Review.review_text, Review.rating).filter(
+            Review.is_processed == True,
+            Review.id > after_id,
+            Review.duplicate_of == None,
+            or_(Review.model_version == None, Review.model_version != versions.analyzer)
+        ).order_by(Review.id).limit(chunk_size).with_for_update(skip_locked=True).all()
+
+        if not reviews:
+            return None, 0
+
+        # En cas d'échec sur un avis, on garde simplement son ancien score
+        results, errors = score_batch(db, reviews, versions.model)
+        for review_id, message in errors:
+            print(f"   ❌ Avis {review_id} non ré-analysé : {message}")
+
+        bulk_update_results(db, results, versions.analyzer, batch_size=WRITE_BATCH_SIZE)
+        # Les doublons de ces avis suivent (sans BERT quand c'est possible, voir score_duplicates)
+        canonical_ids = [review_id for review_id, _, _ in results]
+        while score_duplicates(db, versions, canonical_ids) == WRITE_BATCH_SIZE:
+            pass
+        last_id = reviews[-1].id
+        save_progress(db, versions.analyzer, last_id)
+        db.commit()
+        return last_id, len(results)
+
+    except Exception:
+        db.rollback()
+        raise
+
+    finally:
+        db.close()
+
+def run_backfill(versions: AnalysisVersions, chunk_size: int, pause: float, restart: bool = False):
+    db = SessionLocal()
+    try:
+        after_id = 0 if restart else load_progress(db, versions.analyzer)
+    finally:
+        db.close()
+
+    print(f"🔁 Backfill vers '{versions.analyzer}' à partir de l'avis #{after_id}...")
+    total, start = 0, time.perf_counter()
+
+    while True:
+        # Les nouveaux avis passent toujours avant la ré-analyse
+        while process_reviews(versions):
+            pass
+
+        last_id, count = backfill_chunk(versions, after_id, chunk_size)
+        if last_id is None:
+            break
+
+        after_id = last_id
+        total += count
+        print(f"   ✅ {total} avis ré-analysés (dernier id : {after_id}, "
+              f"{total / (time.perf_counter() - start):.1f} avis/s)")
+        time.sleep(pause)
+
+    print(f"✨ Backfill terminé : {total} avis ré-analysés.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ré-analyse des avis d'une ancienne version de l'analyse.")
+    parser.add_argument("--chunk", type=int, default=1000, help="Avis par paquet")
+    parser.add_argument("--pause", type=float, default=1.0, help="Pause (secondes) entre deux paquets")
+    parser.add_argument("--restart", action="store_true", help="Ignorer l'avancement enregistré")
+    args = parser.parse_args()
+
+    warm_up()
+    init_tables()
+    run_backfill(analysis_versions(), args.chunk, args.pause, args.restart)
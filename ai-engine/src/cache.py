@@ -0,0 +1,109 @@
+import hashlib
+import os
+from collections import OrderedDict
+from sqlalchemy.dialects.postgresql import insert
+from src.analyzer import clean_text, predict_sentiment_batch
+from src.db import SentimentCacheEntry
+
+# Taille max du cache mémoire (par process)
+CACHE_SIZE = int(os.getenv("CACHE_SIZE", 50000))
+
+# Seuls les textes courts sont mis en cache : ce sont eux qui se répètent ("good", "super", "👍")
+CACHE_MAX_CHARS = int(os.getenv("CACHE_MAX_CHARS", 200))
+
+def text_key(cleaned_text: str, model_version: str) -> str:
+    return hashlib.sha256(f"{model_version}\n{cleaned_text}".encode("utf-8")).hexdigest()
+
+class SentimentCache:
+    """
+    Cache des scores de sentiment à deux niveaux :
+    1. LRU en mémoire (propre au process)
+    2. Table `sentiment_cache` partagée par tous les workers
+    Seuls les textes absents des deux niveaux passent par BERT.
+    """
+
+    def __init__(self, max_size: int = CACHE_SIZE):
+        self.max_size = max_size
+        self.memory = OrderedDict()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def _remember(self, key: str, score: float):
+        self.memory[key] = score
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.max_size:
+            self.memory.popitem(last=False)
+
+    def score(self, db, texts: list, model_version: str, **batch_kwargs) -> list:
+        """
+        Même contrat que predict_sentiment_batch (scores dans l'ordre de `texts`).
+        `model_version` (voir analyzer.analysis_versions) fait partie de la clé de cache.
+        Les nouveaux scores sont écrits dans la session `db` (commit par l'appelant).
+        """
+        scores = [None] * len(texts)
+        keys = {}  # index -> clé, pour les textes éligibles au cache
+
+        for i, text in enumerate(texts):
+            if not text or len(text) < 2: continue
+            cleaned_text = clean_text(text)
+            if cleaned_text and len(cleaned_text) <= CACHE_MAX_CHARS:
+                keys[i] = text_key(cleaned_text, model_version)
+
+        # 1. Cache mémoire
+        for i, key in keys.items():
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                scores[i] = self.memory[key]
+                self.memory_hits += 1
+
+        # 2. Cache en base (une seule requête pour tout le lot)
+        wanted = {keys[i] for i in keys if scores[i] is None}
+        if wanted:
+            rows = db.query(SentimentCacheEntry.text_hash, SentimentCacheEntry.sentiment_score)\
+                .filter(SentimentCacheEntry.text_hash.in_(wanted)).all()
+            found = dict(rows)
+            for i, key in keys.items():
+                if scores[i] is None and key in found:
+                    scores[i] = found[key]
+                    self._remember(key, found[key])
+                    self.db_hits += 1
+
+        # 3. Inférence pour le reste (chaque texte distinct n'est analysé qu'une fois)
+        pending = {}
+        for i, text in enumerate(texts):
+            if scores[i] is None:
+                pending.setdefault(keys.get(i, i), []).append(i)
+        self.misses += sum(1 for i in keys if scores[i] is None)
+
+        if pending:
+            groups = list(pending.values())
+            results = predict_sentiment_batch([texts[g[0]] for g in groups], **batch_kwargs)
+            new_entries = {}
+            for group, score in zip(groups, results):
+                for i in group:
+                    scores[i] = score
+                if group[0] in keys:
+                    new_entries[keys[group[0]]] = score
+                    self._remember(keys[group[0]], score)
+
+            # 4. Partage avec les autres workers (clés triées pour éviter les deadlocks)
+            if new_entries:
+                db.execute(insert(SentimentCacheEntry).values([
+                    {"text_hash": key, "model_version": model_version, "sentiment_score": new_entries[key]}
+                    for key in sorted(new_entries)
+                ]).on_conflict_do_nothing(index_elements=["text_hash"]))
+
+        return scores
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.db_hits + self.misses
+        return {
+            "lookups": lookups,
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.db_hits) / lookups, 3) if lookups else 0.0
+        }
+
+sentiment_cache = SentimentCache()
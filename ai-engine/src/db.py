@@ -1,5 +1,8 @@
 import os
-from sqlalchemy import create_engine, Column, Integer, String, Text, Float, Boolean, DateTime
+import select
+from datetime import datetime
+from psycopg2.extras import execute_values
+from sqlalchemy import create_engine, text, Column, Integer, String, Text, Float, Boolean, DateTime
 from sqlalchemy.orm import declarative_base, sessionmaker
 from dotenv import load_dotenv
 
@@ -23,9 +26,156 @@ class Review(Base):
     
     id = Column(Integer, primary_key=True)
     review_text = Column("content", Text) 
+    rating = Column(Integer)
     sentiment_score = Column(Float)
     category = Column(String)
     is_processed = Column(Boolean)
+    model_version = Column(String)
+    ai_status = Column(String)  # None, 'ERROR' ou 'QUARANTINED'
+    ai_attempts = Column(Integer)
+    ai_last_error = Column(Text)
+    duplicate_of = Column(String)  # review_id de l'avis de référence (doublon signalé par le backend)
+
+# Canal sur lequel le backend notifie l'insertion de nouveaux avis (pg_notify)
+NEW_REVIEWS_CHANNEL = "new_reviews"
+
+def listen_new_reviews():
+    """
+    Ouvre une connexion dédiée, abonnée (LISTEN) aux notifications de nouveaux avis.
+    """
+    # On garde la connexion "proxy" : si elle était libérée, le pool la reprendrait
+    conn = engine.raw_connection()
+    conn.dbapi_connection.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(f"LISTEN {NEW_REVIEWS_CHANNEL}")
+    return conn
+
+def close_listener(conn):
+    """
+    Ferme la connexion d'écoute (sans la rendre au pool : elle est en autocommit et abonnée).
+    """
+    try:
+        conn.invalidate()
+    except Exception:
+        pass  # connexion déjà perdue
+
+def wait_for_new_reviews(conn, timeout: float) -> bool:
+    """
+    Bloque jusqu'à une notification (True) ou jusqu'à l'expiration du délai (False).
+    """
+    if conn.notifies:
+        conn.notifies.clear()
+        return True
+    if select.select([conn.fileno()], [], [], timeout) == ([], [], []):
+        return False
+    conn.poll()
+    conn.notifies.clear()
+    return True
+
+def bulk_update_results(db, results: list, model_version: str, batch_size: int = 500):
+    """
+    Écrit les résultats de l'IA [(id, score, catégorie), ...] et la version de l'analyse
+    qui les a produits dans la transaction de `db`,
+    avec un seul UPDATE ... FROM (VALUES ...) par paquet de `batch_size` lignes
+    au lieu d'un UPDATE par avis.
+    """
+    cursor = db.connection().connection.cursor()
+    try:
+        execute_values(
+            cursor,
+            """
+            UPDATE reviews AS r
+            SET sentiment_score = v.sentiment_score, category = v.category, is_processed = TRUE,
+                ai_status = NULL, model_version = v.model_version
+            FROM (VALUES %s) AS v(id, sentiment_score, category, model_version)
+            WHERE r.id = v.id
+            """,
+            [(*result, model_version) for result in results],
+            template="(%s::integer, %s::double precision, %s::varchar, %s::varchar)",
+            page_size=batch_size
+        )
+    finally:
+        cursor.close()
+
+def bulk_record_errors(db, errors: list, max_attempts: int, batch_size: int = 500):
+    """
+    Enregistre les échecs d'analyse [(id, message), ...] : le compteur de tentatives
+    augmente, et l'avis passe en 'QUARANTINED' (plus jamais réservé) après `max_attempts`.
+    """
+    cursor = db.connection().connection.cursor()
+    try:
+        execute_values(
+            cursor,
+            """
+            UPDATE reviews AS r
+            SET ai_attempts = COALESCE(r.ai_attempts, 0) + 1,
+                ai_last_error = v.error,
+                ai_status = CASE WHEN COALESCE(r.ai_attempts, 0) + 1 >= %s
+                                 THEN 'QUARANTINED' ELSE 'ERROR' END
+            FROM (VALUES %%s) AS v(id, error)
+            WHERE r.id = v.id
+            """ % int(max_attempts),
+            errors,
+            template="(%s::integer, %s::text)",
+            page_size=batch_size
+        )
+    finally:
+        cursor.close()
+
+def fetch_duplicates(db, canonical_ids: list = None, limit: int = 500) -> list:
+    """
+    Doublons (duplicate_of) à traiter, avec le texte, la note et le résultat de leur avis de
+    référence, une fois celle-ci analysée (reference_scored), mise en quarantaine ou absente
+    de la base (le doublon est alors analysé lui-même, voir main.score_duplicates).
+    Lignes verrouillées (FOR UPDATE SKIP LOCKED) jusqu'au commit.
+    - canonical_ids=None : doublons pas encore traités (index partiel ix_reviews_pending_duplicates côté backend) ;
+    - canonical_ids=[...] : doublons de ces avis, s'ils n'ont pas la même version de l'analyse (backfill).
+    """
+    if canonical_ids is None:
+        condition = "d.is_processed IS NOT TRUE"
+        params = {"limit": limit}
+    else:
+        if not canonical_ids:
+            return []
+        condition = ("c.id = ANY(:ids) AND "
+                     "(d.is_processed IS NOT TRUE OR d.model_version IS DISTINCT FROM c.model_version)")
+        params = {"limit": limit, "ids": list(canonical_ids)}
+    return db.execute(text(f"""
+        SELECT d.id, d.content AS review_text, d.rating,
+               c.content AS reference_text, c.rating AS reference_rating,
+               c.sentiment_score, c.model_version, c.is_processed IS TRUE AS reference_scored
+        FROM reviews AS d
+        LEFT JOIN reviews AS c ON c.review_id = d.duplicate_of
+        WHERE d.duplicate_of IS NOT NULL AND {condition}
+          AND (c.is_processed = TRUE OR c.ai_status = 'QUARANTINED' OR c.id IS NULL)
+          AND (d.ai_status IS NULL OR d.ai_status != 'QUARANTINED')
+        ORDER BY d.id
+        LIMIT :limit
+        FOR UPDATE OF d SKIP LOCKED
+    """), params).all()
+
+# Cache partagé des scores de sentiment (clé : hash du texte nettoyé + version du modèle)
+class SentimentCacheEntry(Base):
+    __tablename__ = 'sentiment_cache'
+
+    text_hash = Column(String(64), primary_key=True)
+    model_version = Column(String(255), nullable=False)
+    sentiment_score = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+# Avancement des re-analyses (backfill), pour reprendre après une interruption
+class BackfillProgress(Base):
+    __tablename__ = 'backfill_progress'
+
+    analyzer_version = Column(String(255), primary_key=True)
+    last_review_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+def init_tables():
+    """
+    Crée les tables propres à l'ai-engine si elles n'existent pas (la table reviews appartient au backend).
+    """
+    Base.metadata.create_all(bind=engine, tables=[SentimentCacheEntry.__table__, BackfillProgress.__table__])
 
 def get_db():
     db = SessionLocal()
@@ -1,51 +1,283 @@
+import argparse
+import json
+import multiprocessing
+import os
 import time
-from src.db import SessionLocal, Review
-from src.analyzer import predict_sentiment, predict_category
+from sqlalchemy import or_
+from src.db import (SessionLocal, Review, engine, bulk_record_errors, bulk_update_results,
+                    close_listener, fetch_duplicates, init_tables, listen_new_reviews, wait_for_new_reviews)
+from src.analyzer import (STARTUP_TIMINGS, AnalysisVersions, analysis_versions, load_weights, predict_category,
+                          quick_sentiment_batch, warm_up)
+from src.cache import sentiment_cache
 
-SLEEP_TIME = 10  # secondes entre chaque cycle
+SLEEP_TIME = 10  # secondes de pause après une erreur
+FALLBACK_POLL = 120  # secondes max sans vérifier la base si aucune notification n'arrive
+FETCH_SIZE = int(os.getenv("FETCH_SIZE", 50))  # avis réservés par cycle
+INFERENCE_BATCH_SIZE = 32  # avis max par passe BERT
+INFERENCE_MAX_TOKENS = 4096  # budget de tokens (padding inclus) par passe BERT
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", 500))  # lignes par UPDATE groupé
+MAX_ATTEMPTS = int(os.getenv("MAX_ATTEMPTS", 3))  # échecs avant mise en quarantaine d'un avis
 
-def process_reviews():
+# Répartition des avis entre les étages de la cascade (cumul depuis le démarrage)
+ROUTING = {"quick": 0, "model": 0}
+
+def describe_error(error: Exception) -> str:
+    return f"{type(error).__name__}: {error}"[:1000]
+
+def score_batch(db, reviews: list, model_version: str) -> tuple:
+    """
+    Analyse un lot d'avis en isolant les échecs : si l'inférence groupée plante,
+    on repasse avis par avis pour trouver le ou les avis fautifs.
+    `model_version` : clé du cache des scores (voir analyzer.analysis_versions).
+    Renvoie (résultats [(id, score, catégorie)], erreurs [(id, message)]).
+    """
+    texts = [rev.review_text for rev in reviews]
+
+    # 1. Étage rapide (lexique/emojis + note étoilée) : les avis triviaux ne vont pas à BERT
+    scores = quick_sentiment_batch(texts, [rev.rating for rev in reviews])
+    ambiguous = [i for i, score in enumerate(scores) if score is None]
+    ROUTING["quick"] += len(texts) - len(ambiguous)
+    ROUTING["model"] += len(ambiguous)
+
+    # 2. Modèle pour les autres (textes déjà vus servis par le cache)
+    model_texts = [texts[i] for i in ambiguous]
+    try:
+        model_scores = sentiment_cache.score(db, model_texts, model_version, batch_size=INFERENCE_BATCH_SIZE,
+                                             max_tokens=INFERENCE_MAX_TOKENS)
+    except Exception as e:
+        print(f"⚠️ Échec de l'analyse groupée ({e}) : analyse avis par avis...")
+        model_scores = []
+        for text in model_texts:
+            try:
+                model_scores.append(sentiment_cache.score(db, [text], model_version)[0])
+            except Exception as item_error:
+                model_scores.append(item_error)
+
+    for i, score in zip(ambiguous, model_scores):
+        scores[i] = score
+
+    results, errors = [], []
+    for rev, score in zip(reviews, scores):
+        if isinstance(score, Exception):
+            errors.append((rev.id, describe_error(score)))
+            continue
+        try:
+            results.append((rev.id, score, predict_category(rev.review_text)))
+        except Exception as e:
+            errors.append((rev.id, describe_error(e)))
+    return results, errors
+
+def score_duplicates(db, versions: AnalysisVersions, canonical_ids: list = None) -> int:
+    """
+    Analyse un lot de doublons (voir fetch_duplicates) sans repasser par BERT quand c'est possible :
+    1. un doublon trivial passe par l'étage rapide avec SA note (un "super !" à 1★ n'hérite pas
+       du +1.0 d'un "Super" à 5★) ;
+    2. sinon il reprend le score de sa référence, si celui-ci vient du modèle ;
+    3. sinon (référence notée par l'étage rapide d'après sa propre note, en quarantaine ou
+       supprimée), il passe par le modèle, et en quarantaine à son tour s'il échoue aussi.
+    La catégorie (mots-clés, peu coûteuse) est toujours calculée sur son propre texte.
+    Renvoie le nombre de doublons traités (dans la transaction de `db`).
+    """
+    rows = fetch_duplicates(db, canonical_ids, limit=WRITE_BATCH_SIZE)
+    if not rows:
+        return 0
+
+    own_scores = quick_sentiment_batch([row.review_text for row in rows], [row.rating for row in rows])
+    reference_quick = quick_sentiment_batch([row.reference_text for row in rows],
+                                            [row.reference_rating for row in rows])
+
+    results = {}  # version de l'analyse -> [(id, score, catégorie)]
+    to_model = []
+    for row, score, quick in zip(rows, own_scores, reference_quick):
+        if score is not None:
+            results.setdefault(versions.analyzer, []).append((row.id, score, predict_category(row.review_text)))
+        elif row.reference_scored and quick is None:
+            results.setdefault(row.model_version, []).append(
+                (row.id, row.sentiment_score, predict_category(row.review_text)))
+        else:
+            to_model.append(row)
+
+    errors = []
+    if to_model:
+        scored, errors = score_batch(db, to_model, versions.model)
+        results.setdefault(versions.analyzer, []).extend(scored)
+
+    for version, version_results in results.items():
+        bulk_update_results(db, version_results, version, batch_size=WRITE_BATCH_SIZE)
+    if errors:
+        bulk_record_errors(db, errors, MAX_ATTEMPTS, batch_size=WRITE_BATCH_SIZE)
+    return len(rows)
+
+def process_reviews(versions: AnalysisVersions):
+    """
+    Analyse un lot d'avis (résultats enregistrés sous `versions`, voir analyzer.analysis_versions).
+    Retourne True si des avis ont été traités, False si la file est vide, None en cas d'erreur.
+    """
     db = SessionLocal()
     try:
-        # On cherche 50 avis qui n'ont PAS encore été traités (is_processed = False ou Null)
-        reviews = db.query(Review).filter(
+        # Doublons (duplicate_of) : étage rapide ou résultat de leur avis de référence, sans BERT
+        duplicates = score_duplicates(db, versions)
+        if duplicates:
+            db.commit()
+            print(f"📎 {duplicates} doublons traités d'après leur avis de référence.")
+
+        # On réserve FETCH_SIZE avis originaux qui n'ont PAS encore été traités
+        # (is_processed = False ou Null), hors quarantaine.
+        # FOR UPDATE SKIP LOCKED : les lignes restent verrouillées jusqu'au commit et les
+        # autres workers passent directement aux suivantes (pas de double analyse).
+        reviews = db.query(Review.id, Review.review_text, Review.rating).filter(
             (Review.is_processed == False) | (Review.is_processed == None)
-        ).limit(50).all()
+        ).filter(
+            Review.duplicate_of == None,
+            or_(Review.ai_status == None, Review.ai_status != 'QUARANTINED')
+        ).order_by(Review.id).limit(FETCH_SIZE).with_for_update(skip_locked=True).all()
         
         if not reviews:
+            if duplicates:
+                return True  # d'autres doublons attendent peut-être
             print("💤 Pas de nouveaux avis. En attente...")
             return False
 
-        print(f"⚙️ Analyse de {len(reviews)} avis...")
+        print(f"⚙️ [{os.getpid()}] Analyse de {len(reviews)} avis...")
 
-        for rev in reviews:
-            # L'IA travaille
-            score = predict_sentiment(rev.review_text)
-            cat = predict_category(rev.review_text)
-
-            # On met à jour la DB
-            rev.sentiment_score = score
-            rev.category = cat
-            rev.is_processed = True
+        # L'IA travaille (un avis qui plante n'empêche pas les autres d'être enregistrés)
+        results, errors = score_batch(db, reviews, versions.model)
 
+        texts = {rev.id: rev.review_text or '' for rev in reviews}
+        for review_id, score, cat in results:
             icon = "🟢" if score > 0 else "🔴" if score < 0 else "⚪"
-            print(f"   {icon} {cat}: {rev.review_text[:40]}...")
+            print(f"   {icon} {cat}: {texts[review_id][:40]}...")
+        for review_id, message in errors:
+            print(f"   ❌ Avis {review_id} en échec : {message}")
 
+        # On met à jour la DB (UPDATE groupés, même transaction que la réservation)
+        bulk_update_results(db, results, versions.analyzer, batch_size=WRITE_BATCH_SIZE)
+        if errors:
+            bulk_record_errors(db, errors, MAX_ATTEMPTS, batch_size=WRITE_BATCH_SIZE)
         db.commit()
+
+        routed = ROUTING["quick"] + ROUTING["model"]
+        print(f"   ⚡ Cascade : {ROUTING['quick'] / routed:.0%} des avis notés sans BERT "
+              f"(rapide {ROUTING['quick']}, modèle {ROUTING['model']})")
+        stats = sentiment_cache.stats()
+        print(f"   🗃️ Cache : {stats['hit_rate']:.0%} de hits "
+              f"(mémoire {stats['memory_hits']}, base {stats['db_hits']}, BERT {stats['misses']})")
         return True
 
     except Exception as e:
         print(f"❌ Erreur pendant le traitement des avis : {e}")
         db.rollback()
-        return False
+        return None
 
     finally:
         db.close()
 
+def run_worker(forked: bool = False):
+    """
+    Boucle d'analyse d'un worker.
+    forked=True : process lancé par run_workers, qui construit ici son propre moteur d'inférence.
+    """
+    # Après un fork, chaque process doit ouvrir ses propres connexions PostgreSQL
+    engine.dispose(close=False)
+    if forked:
+        warm_up()
+    # Modèle en place (téléchargé si besoin) : son empreinte est définitive
+    versions = analysis_versions()
+    listener = None
+
+    while True:
+        # LISTEN avant de réclamer des avis : un pg_notify envoyé pendant le lot n'est pas perdu
+        if listener is None:
+            try:
+                listener = listen_new_reviews()
+            except Exception as e:
+                print(f"⚠️ Écoute des notifications indisponible ({e}), poll toutes les {SLEEP_TIME}s.")
+
+        worked = process_reviews(versions)
+        if worked:
+            continue
+        if worked is None or listener is None:
+            time.sleep(SLEEP_TIME)  # Pause en cas d'erreur (ou sans notifications)
+            continue
+
+        # File vide : on dort jusqu'au prochain pg_notify du loader (ou le poll de secours)
+        try:
+            wait_for_new_reviews(listener, FALLBACK_POLL)
+        except Exception as e:
+            print(f"⚠️ Écoute des notifications interrompue ({e}), nouvel essai dans {SLEEP_TIME}s.")
+            close_listener(listener)
+            listener = None
+            time.sleep(SLEEP_TIME)
+
+def drain() -> dict:
+    """
+    Analyse tous les avis en attente puis s'arrête (mesure du scoring, voir
+    backend/benchmarks/bench_pipeline.py). Renvoie les durées, démarrage du modèle à part.
+    """
+    warm_up()
+    versions = analysis_versions()
+    start = time.perf_counter()
+    while True:
+        worked = process_reviews(versions)
+        if worked is None:
+            raise RuntimeError("échec de l'analyse d'un lot (voir ci-dessus)")
+        if not worked:
+            break
+    return {"seconds": round(time.perf_counter() - start, 3),
+            "startup_seconds": round(sum(STARTUP_TIMINGS.values()), 2)}
+
+def run_workers(count: int):
+    """
+    Lance `count` workers par fork. Les poids étant déjà chargés dans le process parent
+    (load_weights), ils sont partagés en copy-on-write au lieu d'être rechargés N fois ;
+    chaque worker construit ensuite son propre moteur d'inférence.
+    Un worker qui meurt est relancé.
+    """
+    try:
+        ctx = multiprocessing.get_context("fork")
+    except ValueError:
+        print("⚠️ fork indisponible sur ce système (Windows) : lancement d'un seul worker.")
+        return run_worker(forked=True)
+
+    from src import backends
+    if "INFERENCE_THREADS" not in os.environ:
+        # Les coeurs sont répartis entre les workers (et non N workers x nb de coeurs threads)
+        backends.INFERENCE_THREADS = max(1, (os.cpu_count() or 1) // count)
+
+    workers = []
+    try:
+        while True:
+            workers = [w for w in workers if w.is_alive()]
+            for _ in range(count - len(workers)):
+                worker = ctx.Process(target=run_worker, kwargs={"forked": True}, daemon=True)
+                worker.start()
+                print(f"👷 Worker {worker.pid} démarré.")
+                workers.append(worker)
+            time.sleep(SLEEP_TIME)
+    except KeyboardInterrupt:
+        print("🛑 Arrêt des workers...")
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.join()
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Moteur IA Feedly")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Nombre de process d'analyse (fork après le chargement du modèle)")
+    parser.add_argument("--drain", action="store_true",
+                        help="Analyser les avis en attente puis s'arrêter (durées en JSON sur la dernière ligne)")
+    args = parser.parse_args()
+
     print("🚀 Moteur IA démarré !")
+    init_tables()
     
-    while True:
-        worked = process_reviews()
-        if not worked:
-            time.sleep(SLEEP_TIME)  # Pause si rien à faire ou en cas d'erreur
+    if args.drain:
+        print(json.dumps(drain()))
+    elif args.workers > 1:
+        # Rien d'autre que les poids avant le fork (pas de session onnxruntime, pas d'inférence)
+        load_weights()
+        run_workers(args.workers)
+    else:
+        warm_up()
+        run_worker()
@@ -0,0 +1,107 @@
+"""
+Contrôle de parité : les moteurs optimisés (int8, ONNX) doivent prédire les mêmes
+étoiles que le modèle PyTorch fp32 de référence.
+
+Tolérance : au plus 2 % des avis avec une étoile différente, et jamais plus
+d'une étoile d'écart.
+
+Le mode --cascade mesure de la même façon l'étage rapide (lexique) : part des avis
+notés sans BERT et accord de ces notes avec le modèle.
+
+Usage (depuis le dossier ai-engine) :
+    python -m src.parity --backend onnx              # 500 avis tirés de la base
+    python -m src.parity --backend torch-int8 --file avis.txt   # un avis par ligne
+    python -m src.parity --cascade
+"""
+import argparse
+import sys
+import time
+from sqlalchemy import func
+from src.analyzer import load_model, load_torch_model, predict_sentiment_batch, quick_sentiment_batch
+from src.backends import BACKENDS, build_forward
+
+MAX_DISAGREEMENT = 0.02  # part maximale d'avis avec une étoile différente
+MAX_STAR_GAP = 1         # écart maximal toléré (en étoiles) sur un avis
+
+def load_texts(path: str = None, n: int = 500) -> list:
+    """
+    Avis de test [(texte, note)] : fichier texte (un avis par ligne, sans note)
+    ou échantillon aléatoire de la base.
+    """
+    if path:
+        with open(path, encoding="utf-8") as f:
+            return [(line.strip(), None) for line in f if line.strip()][:n]
+
+    from src.db import SessionLocal, Review
+    db = SessionLocal()
+    try:
+        rows = db.query(Review.review_text, Review.rating).filter(Review.review_text != None)\
+            .order_by(func.random()).limit(n).all()
+        return [(r[0], r[1]) for r in rows]
+    finally:
+        db.close()
+
+def score_stars(texts: list, forward) -> tuple:
+    """
+    Renvoie (étoiles prédites, avis/seconde) pour un moteur donné.
+    """
+    start = time.perf_counter()
+    scores = predict_sentiment_batch(texts, batch_size=64, max_tokens=8192, forward=forward)
+    speed = len(texts) / (time.perf_counter() - start)
+    return [round(s * 2 + 3) for s in scores], speed
+
+def check_parity(texts: list, backend: str) -> bool:
+    model, tokenizer = load_torch_model(), load_model().tokenizer
+    reference = build_forward("torch", model, tokenizer)
+    candidate = build_forward(backend, model, tokenizer)
+
+    ref_stars, ref_speed = score_stars(texts, reference)
+    cand_stars, cand_speed = score_stars(texts, candidate)
+
+    gaps = [abs(a - b) for a, b in zip(ref_stars, cand_stars)]
+    disagreement = sum(1 for g in gaps if g > 0) / max(len(gaps), 1)
+    max_gap = max(gaps, default=0)
+
+    print(f"📊 [Parité] {backend} vs torch fp32 sur {len(texts)} avis")
+    print(f"   Accord exact : {1 - disagreement:.2%} (tolérance : {1 - MAX_DISAGREEMENT:.0%})")
+    print(f"   Écart max    : {max_gap} étoile(s) (tolérance : {MAX_STAR_GAP})")
+    print(f"   Débit        : {ref_speed:.1f} -> {cand_speed:.1f} avis/s (x{cand_speed / ref_speed:.2f})")
+
+    ok = disagreement <= MAX_DISAGREEMENT and max_gap <= MAX_STAR_GAP
+    print("✅ Parité respectée." if ok else "❌ Parité NON respectée.")
+    return ok
+
+def check_cascade(samples: list) -> bool:
+    """
+    Compare l'étage rapide de la cascade au modèle sur les avis qu'il prend en charge.
+    """
+    texts = [text for text, _ in samples]
+    quick = quick_sentiment_batch(texts, [rating for _, rating in samples])
+    routed = [i for i, score in enumerate(quick) if score is not None]
+    model = predict_sentiment_batch([texts[i] for i in routed], batch_size=64, max_tokens=8192)
+
+    gaps = [abs(quick[i] - score) * 2 for i, score in zip(routed, model)]  # écart en étoiles
+    disagreement = sum(1 for g in gaps if g > MAX_STAR_GAP) / max(len(gaps), 1)
+
+    print(f"📊 [Cascade] Étage rapide vs modèle sur {len(texts)} avis")
+    print(f"   Notés sans BERT : {len(routed) / max(len(texts), 1):.2%}")
+    print(f"   Écart > {MAX_STAR_GAP} étoile : {disagreement:.2%} (tolérance : {MAX_DISAGREEMENT:.0%})")
+
+    ok = disagreement <= MAX_DISAGREEMENT
+    print("✅ Cascade conforme." if ok else "❌ Cascade trop éloignée du modèle : resserrer le lexique.")
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Contrôle de parité des moteurs d'inférence.")
+    parser.add_argument("--backend", choices=BACKENDS, default="onnx")
+    parser.add_argument("--file", help="Fichier d'avis (un par ligne) au lieu de la base")
+    parser.add_argument("--n", type=int, default=500, help="Nombre d'avis à comparer")
+    parser.add_argument("--cascade", action="store_true", help="Contrôler l'étage rapide de la cascade")
+    args = parser.parse_args()
+
+    samples = load_texts(args.file, args.n)
+    if args.cascade:
+        ok = check_cascade(samples)
+    else:
+        ok = check_parity([text for text, _ in samples], args.backend)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,108 @@
+"""
+Service de scoring local : garde le modèle chargé (et chaud) dans un seul processus
+et note à la demande de petits lots d'avis (onboarding d'une nouvelle app).
+
+POST /score   {"reviews": [{"text": "...", "rating": 5}, ...]}
+           -> {"model_version": "...", "results": [{"sentiment_score": 0.5, "category": "SATISFACTION"}, ...]}
+GET  /health  -> {"status": "ok", "model_version": "..."}
+
+Usage (depuis le dossier ai-engine) :
+    python -m src.server
+"""
+import json
+import os
+import threading
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.analyzer import AnalysisVersions, analysis_versions, warm_up
+from src.db import SessionLocal, init_tables
+from src.main import score_batch
+
+SCORING_HOST = os.getenv("SCORING_HOST", "127.0.0.1")  # local uniquement par défaut
+SCORING_PORT = int(os.getenv("SCORING_PORT", 8765))
+SCORING_MAX_REVIEWS = int(os.getenv("SCORING_MAX_REVIEWS", 500))  # au-delà : file asynchrone
+
+# Même forme que les lignes lues en base par le worker (id = position dans la requête)
+ScoreRequest = namedtuple("ScoreRequest", ["id", "review_text", "rating"])
+
+# Une inférence à la fois : elle utilise déjà tous les coeurs (INFERENCE_THREADS)
+_inference_lock = threading.Lock()
+
+def score_reviews(reviews: list, versions: AnalysisVersions) -> list:
+    """
+    Note une liste de {"text", "rating"} avec la même cascade / le même cache que le worker.
+    Un avis en échec renvoie un score et une catégorie à null (il repassera par la file).
+    """
+    rows = [ScoreRequest(i, r.get("text") or "", r.get("rating")) for i, r in enumerate(reviews)]
+    db = SessionLocal()
+    try:
+        with _inference_lock:
+            results, errors = score_batch(db, rows, versions.model)
+        db.commit()  # scores ajoutés au cache partagé
+    finally:
+        db.close()
+
+    output = [{"sentiment_score": None, "category": None} for _ in rows]
+    for i, score, category in results:
+        output[i] = {"sentiment_score": score, "category": category}
+    for i, message in errors:
+        output[i]["error"] = message
+    return output
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/health":
+            return self._send_json(404, {"error": "not found"})
+        self._send_json(200, {"status": "ok", "model_version": self.server.versions.analyzer})
+
+    def do_POST(self):
+        if self.path != "/score":
+            return self._send_json(404, {"error": "not found"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            reviews = json.loads(self.rfile.read(length))["reviews"]
+            if not isinstance(reviews, list):
+                raise TypeError("reviews doit être une liste")
+            for review in reviews:
+                if not isinstance(review, dict):
+                    raise TypeError("chaque avis doit être un objet")
+                if not isinstance(review.get("text"), (str, type(None))):
+                    raise TypeError("text doit être une chaîne")
+                rating = review.get("rating")
+                if rating is not None and (isinstance(rating, bool) or not isinstance(rating, (int, float))):
+                    raise TypeError("rating doit être un nombre")
+        except (ValueError, KeyError, TypeError):
+            return self._send_json(400, {"error": "JSON attendu : {\"reviews\": [{\"text\": ..., \"rating\": ...}]}"})
+        if len(reviews) > SCORING_MAX_REVIEWS:
+            return self._send_json(413, {"error": f"{SCORING_MAX_REVIEWS} avis max par requête"})
+
+        try:
+            results = score_reviews(reviews, self.server.versions)
+        except Exception as e:
+            print(f"❌ Erreur de scoring : {e}")
+            return self._send_json(500, {"error": str(e)})
+        self._send_json(200, {"model_version": self.server.versions.analyzer, "results": results})
+
+    def log_message(self, format, *args):
+        pass  # pas de log par requête (le backend appelle à chaque onboarding)
+
+if __name__ == "__main__":
+    warm_up()
+    init_tables()
+    server = ThreadingHTTPServer((SCORING_HOST, SCORING_PORT), ScoringHandler)
+    # Versions résolues une fois le modèle en place (voir analyzer.analysis_versions)
+    server.versions = analysis_versions()
+    print(f"🚀 Service de scoring prêt sur http://{SCORING_HOST}:{SCORING_PORT}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("🛑 Arrêt du service de scoring.")
+        server.server_close()
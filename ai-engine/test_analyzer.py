@@ -0,0 +1,118 @@
+import unicodedata
+from src import analyzer
+from src.analyzer import (_keyword_priority, _make_batches, compile_keywords, fold_text, load_lexicon, predict_category,
+                          quick_sentiment, quick_sentiment_batch)
+
+def test_whole_words():
+    print("🧪 Mots-clés : mots entiers uniquement...")
+    cases = {
+        "Too many ads": "PRICING_ADS",
+        "An ad every minute": "PRICING_ADS",
+        "Bad": "AUTRE",                          # "ad" dans "bad"
+        "Download": "AUTRE",                     # "ad" dans "download"
+        "Opened": "AUTRE",                       # "open" dans "opened"
+        "Application inutile": "AUTRE",          # "utile" dans "inutile"
+        "Très utile": "SATISFACTION",
+    }
+    for text, expected in cases.items():
+        result = predict_category(text)
+        assert result == expected, f"❌ ÉCHEC : '{text}' -> {result} (attendu {expected})"
+    print("✅ TEST RÉUSSI : pas de correspondance au milieu d'un mot.")
+
+def test_accents_and_prefixes():
+    print("🧪 Mots-clés : accents, majuscules et dérivés (mot*)...")
+    cases = {
+        "ÉCRAN   NOIR au démarrage": "BUG_TECHNIQUE",   # accents, majuscules, espaces multiples
+        "ecran noir": "BUG_TECHNIQUE",                  # sans accent dans l'avis
+        "Beaucoup trop chere": "PRICING_ADS",           # "chère" dans le fichier
+        "Génialissime": "SATISFACTION",                 # génial*
+        "It crashes all the time": "BUG_TECHNIQUE",     # crash*
+        "crash": "BUG_TECHNIQUE",
+        "Crashing, great app otherwise": "BUG_TECHNIQUE",  # la catégorie la plus prioritaire l'emporte
+        unicodedata.normalize('NFD', "écran noir"): "BUG_TECHNIQUE",  # accents décomposés (e + ◌́)
+        unicodedata.normalize('NFD', "Beaucoup trop chère"): "PRICING_ADS",
+    }
+    for text, expected in cases.items():
+        result = predict_category(text)
+        assert result == expected, f"❌ ÉCHEC : '{text}' -> {result} (attendu {expected})"
+    assert fold_text("Écran Chère") == "ecran chere", "❌ ÉCHEC : repli des accents"
+    print("✅ TEST RÉUSSI : accents et dérivés reconnus.")
+
+def test_compile_keywords():
+    print("🧪 Regex en arbre de préfixes...")
+    pattern, priorities = compile_keywords([("A", ["crash*", "cher"]), ("B", ["chère", "crash", "mise à jour"])])
+    assert priorities == {"crash*": 0, "cher": 0, "chere": 1, "crash": 1, "mise a jour": 1}, \
+        f"❌ ÉCHEC : priorités {priorities}"
+    found = [m.group() for m in pattern.finditer("crashed, chère, cherry, mise  à jour, ecrash")]
+    assert found == ["crashed", "chère", "mise  à jour"], f"❌ ÉCHEC : {found}"
+    assert _keyword_priority("inconnu") is None, "❌ ÉCHEC : mot inconnu -> None"
+    print("✅ TEST RÉUSSI : regex et priorités cohérentes.")
+
+def test_make_batches():
+    print("🧪 Lots d'inférence : budget de tokens...")
+    lengths = [(i * 37) % 120 + 1 for i in range(200)] + [300]  # le dernier dépasse seul le budget
+    for batch_size, max_tokens in [(32, None), (32, 512), (8, 256), (64, 128)]:
+        batches = _make_batches(lengths, batch_size, max_tokens)
+        indices = sorted(i for batch in batches for i in batch)
+        assert indices == list(range(len(lengths))), f"❌ ÉCHEC : indices perdus ou en double ({batch_size}, {max_tokens})"
+        for batch in batches:
+            assert len(batch) <= batch_size, f"❌ ÉCHEC : lot de {len(batch)} avis (max {batch_size})"
+            if max_tokens and len(batch) > 1:
+                cost = max(lengths[i] for i in batch) * len(batch)
+                assert cost <= max_tokens, f"❌ ÉCHEC : lot de {cost} tokens (budget {max_tokens})"
+    assert [300] in [[lengths[i] for i in batch] for batch in _make_batches(lengths, 32, 128)], \
+        "❌ ÉCHEC : un avis trop long pour le budget doit partir seul"
+    print("✅ TEST RÉUSSI : chaque avis dans un seul lot, budget respecté.")
+
+def _no_model():
+    raise AssertionError("❌ ÉCHEC : l'étage rapide ne doit pas charger le modèle")
+
+def test_cascade_lexicon(monkeypatch):
+    print("🧪 Cascade : avis triviaux notés sans le modèle...")
+    monkeypatch.setattr(analyzer, "load_model", _no_model)
+    cases = {
+        "super": 1.0,                        # mot du lexique
+        "Nul !": -1.0,                       # ponctuation et majuscules ignorées
+        "App très bien": 0.5,                # mots neutres ([FILLERS]) ignorés
+        "👍👍": 1.0,                          # emojis seuls
+        "super 👍": 1.0,
+        "": 0.0,
+        "pas super": None,                   # négation : au modèle
+        "not bad": None,
+        "super 👎": None,                     # signaux contradictoires
+        "super mais lent": None,             # mot inconnu / négation
+        "🦄": None,                           # emoji inconnu
+        "app": None,                         # rien de connu
+        "super super super super": None,     # plus de CASCADE_MAX_WORDS mots
+    }
+    for text, expected in cases.items():
+        result = quick_sentiment(text)
+        assert result == expected, f"❌ ÉCHEC : '{text}' -> {result} (attendu {expected})"
+    print("✅ TEST RÉUSSI : lexique, négations, mots neutres et emojis.")
+
+def test_cascade_rating_and_switch(monkeypatch):
+    print("🧪 Cascade : note étoilée et désactivation...")
+    monkeypatch.setattr(analyzer, "CASCADE_USE_RATING", True)
+    assert quick_sentiment("super", rating=5) == 1.0, "❌ ÉCHEC : la note confirme le lexique"
+    assert quick_sentiment("super", rating=1) is None, "❌ ÉCHEC : note contraire (ironie) -> modèle"
+    assert quick_sentiment_batch(["super", "pas super"], [4, 4]) == [0.5, None], "❌ ÉCHEC : lot"
+
+    monkeypatch.setattr(analyzer, "CASCADE_ENABLED", False)
+    assert quick_sentiment_batch(["super", "👍"]) == [None, None], "❌ ÉCHEC : cascade désactivée"
+    print("✅ TEST RÉUSSI : la note confirme le lexique, la cascade se coupe.")
+
+def test_load_lexicon(tmp_path):
+    print("🧪 Lecture du lexique (.ini)...")
+    path = tmp_path / "lexicon.ini"
+    path.write_text("[WORDS]\nsuper = 1.0\nbof = -0.5\n[EMOJIS]\n👍 = 1\n"
+                    "[FILLERS]\nwords = app, très,\n        jeu\n[NEGATIONS]\nwords = pas, not\n", encoding="utf-8")
+    words, emojis, fillers, negations = load_lexicon(str(path))
+    assert words == {"super": 1.0, "bof": -0.5} and emojis == {"👍": 1.0}, f"❌ ÉCHEC : {words} {emojis}"
+    assert fillers == {"app", "très", "jeu"} and negations == {"pas", "not"}, f"❌ ÉCHEC : {fillers} {negations}"
+    print("✅ TEST RÉUSSI : mots, emojis, mots neutres et négations lus.")
+
+if __name__ == "__main__":
+    test_whole_words()
+    test_accents_and_prefixes()
+    test_compile_keywords()
+    test_make_batches()
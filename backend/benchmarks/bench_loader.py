@@ -0,0 +1,83 @@
+"""
+Compare les stratégies de chargement des avis : ligne par ligne (ancien loader),
+INSERT groupés (ON CONFLICT) et COPY + table temporaire, à plusieurs volumes.
+Sert à choisir COPY_MIN_ROWS dans src/pipeline/loader.py.
+
+Chaque mesure tourne dans une transaction annulée à la fin : la base n'est pas modifiée.
+Nécessite PostgreSQL (variables DB_* du .env).
+
+Usage (depuis le dossier backend) :
+    python -m benchmarks.bench_loader --sizes 10000,100000,1000000
+"""
+import argparse
+import json
+import time
+
+import pandas as pd
+
+from src.database.db_manager import SessionLocal
+from src.database.models import Application, Review
+from src.pipeline.loader import copy_reviews, dataframe_to_rows, prepare_reviews, upsert_reviews
+from src.scraper import fixtures
+from src.scraper.scraper_module import reviews_to_dataframe
+
+def synthetic_dataframe(n: int) -> pd.DataFrame:
+    pages, token = [], None
+    while len(pages) * 1000 < n:
+        page, token = fixtures.synthetic_page("benchmark.loader", "fr", "fr", token, count=1000, total=n)
+        pages.append(reviews_to_dataframe(page, "fr", "fr"))
+        if token is None:
+            break
+    return pd.concat(pages, ignore_index=True)
+
+def row_by_row(db, df: pd.DataFrame, app_id: int) -> int:
+    """
+    Ancienne implémentation : un SELECT d'existence puis un add() par avis.
+    """
+    new_count = 0
+    for row in dataframe_to_rows(df, app_id):
+        if not db.query(Review.review_id).filter_by(review_id=row['review_id']).first():
+            db.add(Review(**row))
+            db.flush()  # l'ancien loader s'appuyait sur l'autoflush de la requête suivante
+            new_count += 1
+    return new_count
+
+STRATEGIES = {
+    "row_by_row": row_by_row,
+    "batched_insert": lambda db, df, app_id: upsert_reviews(db, dataframe_to_rows(df, app_id))[0],
+    "copy": lambda db, df, app_id: copy_reviews(db, prepare_reviews(df, app_id)),
+}
+
+def measure(strategy: str, df: pd.DataFrame) -> dict:
+    db = SessionLocal()
+    try:
+        app = Application(package_name="benchmark.loader", name="benchmark")
+        db.add(app)
+        db.flush()
+        start = time.perf_counter()
+        inserted = STRATEGIES[strategy](db, df, app.id)
+        db.flush()
+        duration = time.perf_counter() - start
+        return {"strategy": strategy, "rows": len(df), "inserted": inserted,
+                "seconds": round(duration, 3), "rows_per_sec": round(len(df) / duration)}
+    finally:
+        db.rollback()
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--max-row-by-row", type=int, default=100000,
+                        help="Taille max pour l'ancien loader (trop lent au-delà)")
+    args = parser.parse_args()
+
+    results = []
+    for n in (int(x) for x in args.sizes.split(",")):
+        df = synthetic_dataframe(n)
+        for strategy in STRATEGIES:
+            if strategy == "row_by_row" and n > args.max_row_by_row:
+                continue
+            results.append(measure(strategy, df))
+            print(f"   {strategy:<15} {n:>8} avis : {results[-1]['seconds']}s", flush=True)
+
+    print(json.dumps(results, indent=2))
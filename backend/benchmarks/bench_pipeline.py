@@ -0,0 +1,133 @@
+"""
+Benchmark de bout en bout du pipeline, hors-ligne : scraping -> process_dataframe -> load_reviews_to_db -> scoring.
+Les pages viennent des réponses enregistrées (--mode replay, voir SCRAPER_MODE=record) ou du générateur
+synthétique (--mode synthetic, n'importe quel volume). Résultat en JSON : durée et avis/s par étape.
+Le scoring (--score) a lieu après le chargement, comme en production : les workers de l'ai-engine
+(`python -m src.main --drain`, même base) analysent les avis en attente, puis on compte ceux de l'app
+réellement notés en base.
+
+Usage (depuis le dossier backend) :
+    python -m benchmarks.bench_pipeline --mode synthetic --n 20000 --no-load
+    python -m benchmarks.bench_pipeline --mode replay --app com.whatsapp --score
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from src.scraper import fixtures, scraper_module
+from src.scraper.scraper_module import iter_review_pages
+from src.pipeline.cleaner import process_dataframe
+
+STAGES = ["scrape", "clean", "load", "score"]
+
+# Dossier de l'ai-engine (paquet `src` distinct : lancé dans un process à part)
+AI_ENGINE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "ai-engine")
+
+def count_scored(app_id: str) -> tuple:
+    """
+    (avis notés, avis en base) pour cette application.
+    """
+    from sqlalchemy import func
+    from src.database.db_manager import SessionLocal
+    from src.database.models import Application, Review
+
+    db = SessionLocal()
+    try:
+        return db.query(func.count(Review.id).filter(Review.is_processed == True), func.count(Review.id))\
+            .join(Application, Review.app_id == Application.id)\
+            .filter(Application.package_name == app_id).one()
+    finally:
+        db.close()
+
+def drain_ai_engine() -> dict:
+    """
+    Lance les workers de l'ai-engine jusqu'à ce que la file soit vide. Renvoie leurs durées
+    (dernière ligne de la sortie, voir src/main.py:drain dans l'ai-engine).
+    """
+    output = subprocess.run([sys.executable, "-m", "src.main", "--drain"], cwd=AI_ENGINE_DIR,
+                            check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def run(app_id: str, lang: str, country: str, n: int, load: bool, score: bool) -> dict:
+    """
+    Rejoue le flux du worker d'historique page par page en chronométrant chaque étape.
+    """
+    timings = {stage: 0.0 for stage in STAGES}
+    reviews = 0
+    start = time.perf_counter()
+
+    pages = iter_review_pages(app_id, lang, country, max_count=n)
+    while True:
+        t = time.perf_counter()
+        page = next(pages, None)
+        timings["scrape"] += time.perf_counter() - t
+        if page is None:
+            break
+        df = page[0]
+        reviews += len(df)
+
+        t = time.perf_counter()
+        df = process_dataframe(df)
+        timings["clean"] += time.perf_counter() - t
+
+        if load:
+            from src.pipeline.loader import load_reviews_to_db
+            t = time.perf_counter()
+            load_reviews_to_db(df, package_name=app_id)
+            timings["load"] += time.perf_counter() - t
+
+    scoring = {}
+    if score:
+        # Scoring des avis chargés (le démarrage du modèle est mesuré à part)
+        scored_before, _ = count_scored(app_id)
+        drained = drain_ai_engine()
+        timings["score"] = drained["seconds"]
+        scored, stored = count_scored(app_id)
+        scoring = {"startup_seconds": drained["startup_seconds"], "scored": scored - scored_before,
+                   "unscored": stored - scored}
+        if scoring["unscored"]:
+            print(f"⚠️ {scoring['unscored']} avis de {app_id} non notés (quarantaine ou erreur de l'ai-engine).",
+                  file=sys.stderr)
+
+    total = time.perf_counter() - start - scoring.get("startup_seconds", 0)
+    skipped = {"load": not load, "score": not score}
+    stages = {
+        stage: {"seconds": round(seconds, 3),
+                "reviews_per_sec": round(reviews / seconds, 1) if seconds else None}
+        for stage, seconds in timings.items() if not skipped.get(stage)
+    }
+    if score:
+        # Débit du scoring : avis réellement notés par cette mesure, pas avis récupérés
+        stages["score"].update(scoring, reviews_per_sec=round(scoring["scored"] / timings["score"], 1)
+                               if timings["score"] else None)
+    return {
+        "reviews": reviews,
+        "seconds": round(total, 3),
+        "reviews_per_sec": round(reviews / total, 1) if total else None,
+        "stages": stages,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mode", choices=["synthetic", "replay"], default="synthetic")
+    parser.add_argument("--app", default="com.example.synthetic", help="Application (mode replay : déjà enregistrée)")
+    parser.add_argument("--lang", default="fr")
+    parser.add_argument("--country", default="fr")
+    parser.add_argument("--n", type=int, default=20000, help="Nombre d'avis (max)")
+    parser.add_argument("--no-load", dest="load", action="store_false", help="Sans écriture en base")
+    parser.add_argument("--score", action="store_true",
+                        help="Avec le scoring des avis chargés par les workers de l'ai-engine (même base)")
+    args = parser.parse_args()
+    if args.score and not args.load:
+        parser.error("--score note les avis chargés en base : incompatible avec --no-load")
+
+    scraper_module.SCRAPER_MODE = args.mode
+    fixtures.SYNTHETIC_REVIEWS = args.n
+
+    result = run(args.app, args.lang, args.country, args.n, args.load, args.score)
+    print(json.dumps({"mode": args.mode, "app": args.app, **result}, indent=2))
+    if args.score and not result["stages"]["score"]["scored"]:
+        sys.exit("❌ Aucun avis noté : le scoring n'a rien mesuré (ai-engine, base ou avis déjà notés ?)")
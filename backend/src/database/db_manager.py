@@ -1,5 +1,5 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, scoped_session
 from dotenv import load_dotenv
 from src.database.models import Base
@@ -23,6 +23,37 @@ engine = create_engine(DATABASE_URL, pool_pre_ping=True)
 # Factory de sessions (pour interagir avec la DB)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Colonnes ajoutées après la création initiale des tables.
+# create_all() ne modifie pas une table existante : on les ajoute ici (idempotent).
+SCHEMA_UPGRADES = [
+    "ALTER TABLE reviews ADD COLUMN IF NOT EXISTS ai_status VARCHAR(20)",
+    "ALTER TABLE reviews ADD COLUMN IF NOT EXISTS ai_attempts INTEGER DEFAULT 0",
+    "ALTER TABLE reviews ADD COLUMN IF NOT EXISTS ai_last_error TEXT",
+    "ALTER TABLE reviews ADD COLUMN IF NOT EXISTS model_version VARCHAR(255)",
+    "CREATE INDEX IF NOT EXISTS ix_reviews_model_version ON reviews (model_version)",
+    "ALTER TABLE reviews ADD COLUMN IF NOT EXISTS locale VARCHAR(10)",
+    "ALTER TABLE reviews ADD COLUMN IF NOT EXISTS developer_reply TEXT",
+    "ALTER TABLE reviews ADD COLUMN IF NOT EXISTS replied_at TIMESTAMP",
+    "ALTER TABLE scrape_checkpoints ADD COLUMN IF NOT EXISTS watermark TIMESTAMP",
+    "ALTER TABLE scrape_checkpoints ADD COLUMN IF NOT EXISTS resume_token TEXT",
+    "ALTER TABLE scrape_checkpoints ADD COLUMN IF NOT EXISTS resume_watermark TIMESTAMP",
+    "ALTER TABLE reviews ADD COLUMN IF NOT EXISTS content_hash VARCHAR(40)",
+    "CREATE INDEX IF NOT EXISTS ix_reviews_content_hash ON reviews (app_id, content_hash)",
+    "ALTER TABLE reviews ADD COLUMN IF NOT EXISTS duplicate_of VARCHAR(255)",
+    "CREATE INDEX IF NOT EXISTS ix_reviews_duplicate_of ON reviews (duplicate_of) WHERE duplicate_of IS NOT NULL",
+    # Copies en attente du résultat de leur avis de référence (ai-engine)
+    "CREATE INDEX IF NOT EXISTS ix_reviews_pending_duplicates ON reviews (duplicate_of) "
+    "WHERE duplicate_of IS NOT NULL AND is_processed IS NOT TRUE",
+]
+
+def upgrade_schema():
+    """
+    Applique les colonnes ajoutées depuis la première version du schéma.
+    """
+    with engine.begin() as conn:
+        for statement in SCHEMA_UPGRADES:
+            conn.execute(text(statement))
+
 def init_db():
     """
     Crée les tables dans la base de données si elles n'existent pas.
@@ -30,6 +61,7 @@ def init_db():
     try:
         print(f"🔄 Tentative de connexion à {DB_NAME} sur {DB_HOST}...")
         Base.metadata.create_all(bind=engine)
+        upgrade_schema()
         print("✅ Tables créées avec succès !")
     except Exception as e:
         print(f"❌ Erreur lors de l'initialisation de la DB : {e}")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, Text, ForeignKey, Float, Boolean
+from sqlalchemy import Column, String, Integer, DateTime, Text, ForeignKey, Float, Boolean, UniqueConstraint
 from sqlalchemy.orm import declarative_base, relationship
 from datetime import datetime
 
@@ -48,11 +48,23 @@ class Review(Base):
     user_name = Column(String(255), nullable=True)
     rating = Column(Integer, nullable=False) # Note de 1 à 5
     content = Column(Text, nullable=True)    # Le commentaire
+
+    # Marché d'origine (langue_PAYS, ex: 'fr_FR') : sert aussi de curseur incrémental par marché
+    locale = Column(String(10), nullable=True)
     
     # Dates
     posted_at = Column(DateTime, nullable=False, index=True) # Date écrite par l'utilisateur
     collected_at = Column(DateTime, default=datetime.utcnow) # Date où on l'a récupéré
 
+    # Doublons (voir pipeline/dedup.py) : empreinte du texte normalisé, et review_id de l'avis
+    # de référence pour les copies et quasi-doublons (None : avis original)
+    content_hash = Column(String(40), nullable=True)
+    duplicate_of = Column(String(255), nullable=True)
+
+    # Réponse du développeur (mise à jour par les rafraîchissements)
+    developer_reply = Column(Text, nullable=True)
+    replied_at = Column(DateTime, nullable=True)
+
     # --- Colonnes pour l'IA (Aide à la décision) ---
     # Score de sentiment (-1.0 à +1.0)
     sentiment_score = Column(Float, nullable=True) 
@@ -63,6 +75,14 @@ class Review(Base):
     # Est-ce que l'IA a déjà analysé cet avis ?
     is_processed = Column(Boolean, default=False)
 
+    # Version de l'analyse (modèle + mots-clés) qui a produit sentiment_score / category
+    model_version = Column(String(255), nullable=True, index=True)
+
+    # Suivi des échecs d'analyse : None (OK), 'ERROR' (sera retenté) ou 'QUARANTINED' (ignoré)
+    ai_status = Column(String(20), nullable=True)
+    ai_attempts = Column(Integer, default=0)
+    ai_last_error = Column(Text, nullable=True)
+
     # Relation inverse
     application = relationship("Application", back_populates="reviews")
 
@@ -70,6 +90,39 @@ class Review(Base):
         return f"<Review(id='{self.review_id}', rating={self.rating})>"
 
 
+# 3 bis. Avancement des scrapings d'historique (reprise après un crash du worker)
+class ScrapeCheckpoint(Base):
+    __tablename__ = 'scrape_checkpoints'
+    __table_args__ = (UniqueConstraint('package_name', 'country', 'lang'),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    package_name = Column(String(255), nullable=False)
+    country = Column(String(10), nullable=False)
+    lang = Column(String(10), nullable=False)
+
+    # Jeton Google Play de la page suivante (None : pas encore commencé ou terminé)
+    token = Column(Text, nullable=True)
+
+    # Nombre d'avis déjà récupérés
+    fetched = Column(Integer, default=0)
+
+    completed_at = Column(DateTime, nullable=True)
+
+    # Curseur du scraping incrémental : date du plus récent avis vu lors du dernier parcours
+    # complet de ce marché (n'avance jamais sur un parcours interrompu)
+    watermark = Column(DateTime, nullable=True)
+
+    # Parcours incrémental interrompu (erreur ou limite d'avis atteinte avant le curseur) :
+    # jeton de la page où le reprendre, et date du plus récent avis vu (futur curseur)
+    resume_token = Column(Text, nullable=True)
+    resume_watermark = Column(DateTime, nullable=True)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ScrapeCheckpoint(package='{self.package_name}', fetched={self.fetched})>"
+
+
 # 4. Table pour les Utilisateurs (Auth)
 class User(Base):
     __tablename__ = 'users'
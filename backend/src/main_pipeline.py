@@ -1,6 +1,15 @@
 import time
-from src.scraper.scraper_module import collect_reviews
-from src.pipeline.loader import load_reviews_to_db
+import configparser
+from concurrent.futures import ThreadPoolExecutor
+from src.scraper.scraper_module import DEFAULT_LOCALE, collect_locales
+from src.pipeline.cleaner import process_dataframe
+from src.pipeline.loader import get_resume_points, get_watermarks, load_reviews_to_db, save_watermarks
+
+# --- CHARGEMENT CONFIGURATION ---
+config = configparser.ConfigParser()
+config.read('config/settings.ini')
+# Applications traitées en parallèle (le débit vers le Play Store reste limité par PLAY_STORE_LIMITER)
+SCRAPER_WORKERS = config.getint('SCRAPER', 'workers', fallback=8)
 
 # Liste temporaire des applications à surveiller
 # Plus tard, on lira ça depuis la base de données ou un fichier config
@@ -10,40 +19,71 @@ TARGET_APPS = [
     "com.linkedin.android"     # LinkedIn
 ]
 
-def run_pipeline():
+def process_app(app_id: str) -> dict:
+    """
+    Flux ETL d'une application. Renvoie ses mesures (durée, avis récupérés, statut).
+    """
+    start_time = time.time()
+    print(f"🔹 Traitement de l'application : {app_id}")
+
+    # Une app en échec (base, scraping, nettoyage) ne doit pas interrompre les autres
+    try:
+        return _process_app(app_id, start_time)
+    except Exception as e:
+        print(f"❌ Erreur critique lors du traitement de {app_id}: {e}")
+        return {"app": app_id, "reviews": 0, "seconds": time.time() - start_time, "status": "erreur"}
+
+def _process_app(app_id: str, start_time: float) -> dict:
+    # 1. ÉTAPE EXTRACTION
+    # Incrémental et multi-marchés : uniquement les avis postés depuis le dernier passage
+    # (50 avis max par marché au premier passage, pour tester : mettez 1000+ pour la prod)
+    df_reviews, cursors = collect_locales(app_id, watermarks=get_watermarks(app_id, DEFAULT_LOCALE), max_count=50,
+                                          resume_points=get_resume_points(app_id))
+
+    if df_reviews.empty:
+        print(f"⚠️ Pas de nouvelles données pour {app_id}. Passage au suivant.")
+        save_watermarks(app_id, cursors)
+        return {"app": app_id, "reviews": 0, "seconds": time.time() - start_time, "status": "vide"}
+
+    # 2. ÉTAPE TRANSFORMATION
+    # Nettoyage des textes et signalement des doublons (duplicate_of)
+    df_reviews = process_dataframe(df_reviews)
+
+    # 3. ÉTAPE CHARGEMENT
+    status = "ok"
+    try:
+        if load_reviews_to_db(df_reviews, package_name=app_id) is None:
+            # Lot mis en attente (ou en CSV) : curseurs inchangés, le prochain passage relit ces avis
+            status = "erreur"
+        else:
+            save_watermarks(app_id, cursors)
+    except Exception as e:
+        print(f"❌ Erreur critique lors de la sauvegarde de {app_id}: {e}")
+        status = "erreur"
+
+    return {"app": app_id, "reviews": len(df_reviews), "seconds": time.time() - start_time, "status": status}
+
+def run_pipeline(max_workers: int = SCRAPER_WORKERS):
     """
     Fonction principale qui orchestre le flux ETL :
     1. EXTRACT (Scraper)
     2. LOAD (Database)
+    Les applications sont traitées en parallèle (max_workers threads).
     """
-    print("🚀 Démarrage du Pipeline de Données...")
-    
+    print(f"🚀 Démarrage du Pipeline de Données ({len(TARGET_APPS)} apps, {max_workers} en parallèle)...")
+
     total_start_time = time.time()
 
-    for app_id in TARGET_APPS:
-        print(f"\n---------------------------------------------")
-        print(f"🔹 Traitement de l'application : {app_id}")
-        
-        # 1. ÉTAPE EXTRACTION
-        # On récupère 50 avis pour tester (mettez 1000+ pour la prod)
-        df_reviews = collect_reviews(app_id, count=50)
-        
-        if df_reviews.empty:
-            print(f"⚠️ Pas de données récupérées pour {app_id}. Passage au suivant.")
-            continue
-            
-        # 2. ÉTAPE TRANSFORMATION (Optionnelle ici)
-        # Si vous aviez un cleaner.py, il passerait ici.
-        # ex: df_clean = clean_text(df_reviews)
-        
-        # 3. ÉTAPE CHARGEMENT
-        try:
-            load_reviews_to_db(df_reviews, package_name=app_id)
-        except Exception as e:
-            print(f"❌ Erreur critique lors de la sauvegarde de {app_id}: {e}")
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        timings = list(pool.map(process_app, TARGET_APPS))
 
     total_duration = time.time() - total_start_time
-    print(f"\n✨ Pipeline terminé en {total_duration:.2f} secondes.")
+    print(f"\n---------------------------------------------")
+    print("⏱️ Durée par application :")
+    for t in sorted(timings, key=lambda t: t["seconds"], reverse=True):
+        print(f"   {t['app']:<40} {t['seconds']:>7.2f}s  {t['reviews']:>6} avis  ({t['status']})")
+    print(f"\n✨ Pipeline terminé en {total_duration:.2f} secondes "
+          f"(somme des apps : {sum(t['seconds'] for t in timings):.2f}s).")
 
 if __name__ == "__main__":
-    run_pipeline()
\ No newline at end of file
+    run_pipeline()
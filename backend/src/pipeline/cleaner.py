@@ -1,5 +1,12 @@
 import pandas as pd
 import re
+from src.pipeline.dedup import flag_duplicates
+
+# Espaces invisibles (sauts de ligne, tabulations, espaces multiples)
+WHITESPACE = re.compile(r"\s+")
+
+# Artefacts Google Play : les avis traduits contiennent souvent ces mentions
+TRANSLATION_TAGS = re.compile(r"\(Translated by Google\)|\(Original\)")
 
 def clean_text(text: str) -> str:
     """
@@ -12,26 +19,33 @@ def clean_text(text: str) -> str:
 
     # 1. Suppression des espaces invisibles (sauts de ligne, tabulations)
     # "  Bonjour   \n " devient "Bonjour"
-    cleaned = " ".join(text.split())
+    cleaned = WHITESPACE.sub(" ", text)
 
     # 2. Suppression des artefacts Google Play (si présents)
-    # Les avis traduits contiennent souvent ce texte
-    cleaned = cleaned.replace("(Translated by Google)", "").replace("(Original)", "")
+    cleaned = TRANSLATION_TAGS.sub("", cleaned)
 
     return cleaned.strip()
 
 def process_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     """
     Fonction principale de Transformation (ETL).
-    Prend un DataFrame brut et renvoie un DataFrame propre.
+    Prend un DataFrame brut et renvoie un DataFrame propre,
+    avec les doublons signalés (colonnes content_hash et duplicate_of, voir dedup.py).
     """
     if df.empty:
         return df
 
     print(f"🧹 [Cleaner] Nettoyage de {len(df)} avis...")
 
-    # 1. Appliquer le nettoyage de texte
-    df['review_text'] = df['review_text'].apply(clean_text)
+    # 1. Nettoyage de texte (même résultat que clean_text, sur toute la colonne d'un coup)
+    # (valeurs non textuelles -> NaN -> "")
+    texts = df['review_text']
+    if pd.api.types.is_numeric_dtype(texts):
+        texts = pd.Series("", index=df.index)  # aucun texte dans la colonne (ex: que des NaN)
+    df['review_text'] = (texts.str.replace(WHITESPACE, " ", regex=True)
+                              .str.replace(TRANSLATION_TAGS, "", regex=True)
+                              .str.strip()
+                              .fillna(""))
 
     # 2. Filtrer les avis vides (si on ne veut pas stocker juste des étoiles)
     # On garde seulement si le commentaire a au moins 2 caractères
@@ -42,4 +56,8 @@ def process_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     if initial_count != final_count:
         print(f"   🗑️ {initial_count - final_count} avis vides supprimés.")
 
-    return df
\ No newline at end of file
+    # 3. Doublons exacts et quasi-doublons (l'ai-engine et le chat ne traitent que les originaux)
+    if 'review_id' in df.columns:
+        df = flag_duplicates(df)
+
+    return df
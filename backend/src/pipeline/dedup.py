@@ -0,0 +1,111 @@
+import re
+import hashlib
+import numpy as np
+import pandas as pd
+
+# Texte normalisé pour la comparaison : minuscules, ponctuation / emojis / espaces -> un espace
+SEPARATORS = re.compile(r"[\W_]+")
+
+# Quasi-doublons (MinHash + LSH) : similarité de Jaccard minimale entre les n-grammes de deux avis
+NEAR_DUP_THRESHOLD = 0.8
+
+# Les avis plus courts ("Super", "Nul", ...) ne sont comparés qu'à l'identique
+NEAR_DUP_MIN_CHARS = 40
+
+# n-grammes d'octets du texte normalisé
+SHINGLE_SIZE = 5
+
+# Signature MinHash : LSH_BANDS bandes de LSH_ROWS valeurs (seuil LSH ~ (1/16)^(1/4) = 0.5,
+# les paires candidates sont ensuite vérifiées avec la vraie similarité)
+LSH_BANDS = 16
+LSH_ROWS = 4
+
+# Hachage universel (a*x + b) mod p, avec p premier de Mersenne 2^31 - 1 (pas de débordement en uint64)
+MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.default_rng(42)
+_HASH_A = _rng.integers(1, int(MERSENNE_PRIME), LSH_BANDS * LSH_ROWS, dtype=np.uint64)
+_HASH_B = _rng.integers(0, int(MERSENNE_PRIME), LSH_BANDS * LSH_ROWS, dtype=np.uint64)
+_SHINGLE_WEIGHTS = np.array([257 ** i for i in range(SHINGLE_SIZE)], dtype=np.uint64)
+
+def normalize_text(texts: pd.Series) -> pd.Series:
+    """
+    "Super appli !!! 👍" -> "super appli"
+    """
+    return texts.str.lower().str.replace(SEPARATORS, " ", regex=True).str.strip()
+
+def content_hashes(normalized: pd.Series) -> list:
+    """
+    Empreinte SHA-1 du texte normalisé (None si le texte normalisé est vide, ex: emoji seul).
+    """
+    return [hashlib.sha1(t.encode("utf-8")).hexdigest() if t else None for t in normalized]
+
+def shingles(text: str) -> np.ndarray:
+    """
+    Ensemble (trié, sans doublon) des n-grammes d'octets du texte, hachés dans [0, p).
+    """
+    data = np.frombuffer(text.encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+    windows = np.lib.stride_tricks.sliding_window_view(data, min(SHINGLE_SIZE, len(data)))
+    return np.unique(windows @ _SHINGLE_WEIGHTS[:windows.shape[1]] % MERSENNE_PRIME)
+
+def near_duplicate_roots(texts: list) -> list:
+    """
+    Regroupe les textes quasi identiques (MinHash + LSH, puis vérification de la similarité).
+    Renvoie pour chaque texte la position du premier texte de son groupe (lui-même s'il est seul).
+    """
+    sets = [shingles(text) for text in texts]
+    parent = list(range(len(texts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    buckets = {}
+    for i, values in enumerate(sets):
+        signature = ((_HASH_A[:, None] * values[None, :] + _HASH_B[:, None]) % MERSENNE_PRIME).min(axis=1)
+        for band in range(LSH_BANDS):
+            key = (band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes())
+            buckets.setdefault(key, []).append(i)
+
+    for members in buckets.values():
+        # On compare au premier du seau uniquement : linéaire même pour une campagne de spam
+        first = members[0]
+        for i in members[1:]:
+            a, b = find(first), find(i)
+            if a == b:
+                continue
+            common = len(np.intersect1d(sets[first], sets[i], assume_unique=True))
+            if common / (len(sets[first]) + len(sets[i]) - common) >= NEAR_DUP_THRESHOLD:
+                parent[max(a, b)] = min(a, b)
+
+    return [find(i) for i in range(len(texts))]
+
+def flag_duplicates(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ajoute au DataFrame nettoyé :
+    - content_hash : empreinte du texte normalisé (doublons exacts, y compris avec les lots déjà en base) ;
+    - duplicate_of : review_id de l'avis de référence (le premier du lot) pour les copies exactes
+      et les quasi-doublons, vide pour les originaux.
+    """
+    normalized = normalize_text(df['review_text'])
+    hashes = pd.Series(content_hashes(normalized), index=df.index, dtype=object)
+
+    # 1. Doublons exacts : même empreinte
+    reference = df['review_id'].groupby(hashes, sort=False).transform('first').fillna(df['review_id'])
+    exact = int(reference.ne(df['review_id']).sum())
+
+    # 2. Quasi-doublons parmi les originaux assez longs
+    candidates = reference.eq(df['review_id']) & hashes.notna() & normalized.str.len().ge(NEAR_DUP_MIN_CHARS)
+    positions = np.flatnonzero(candidates.to_numpy())
+    review_ids = df['review_id'].to_numpy()
+    roots = near_duplicate_roots(normalized.to_numpy()[positions].tolist())
+    near = {review_ids[positions[i]]: review_ids[positions[root]] for i, root in enumerate(roots) if root != i}
+
+    # Les copies exactes d'un quasi-doublon suivent sa référence
+    reference = reference.map(near).fillna(reference)
+    duplicate_of = reference.where(reference.ne(df['review_id']), None).astype(object)
+
+    if exact or near:
+        print(f"   🔁 {exact} doublons exacts et {len(near)} quasi-doublons signalés.")
+    return df.assign(content_hash=hashes, duplicate_of=duplicate_of)
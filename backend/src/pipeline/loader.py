@@ -1,13 +1,58 @@
+import io
+import glob
+import uuid
 import pandas as pd
 import os
+import psycopg2
 from datetime import datetime
+from sqlalchemy import case, func, literal_column, or_, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import InterfaceError, OperationalError
 from sqlalchemy.orm import Session
-from src.database.models import Application, Review
+from src.database.models import Application, Review, ScrapeCheckpoint
 from src.database.db_manager import get_db
+from src.scraper.scraper_module import locale_key
 
 # Chemins de secours
 BACKUP_DIR = "data/processed"
 
+# Lots en attente de ré-insertion (Parquet), rejoués par la tâche replay_spool
+SPOOL_DIR = "data/spool"
+
+# Canal PostgreSQL écouté par les workers de l'ai-engine (LISTEN new_reviews)
+NEW_REVIEWS_CHANNEL = "new_reviews"
+
+# Erreurs passagères (base injoignable, connexion coupée) : seuls ces lots sont mis en attente et rejoués.
+# Les autres (NOT NULL, VARCHAR trop court, champ COPY invalide...) échoueraient à chaque rejeu.
+# COPY passe par le curseur psycopg2 : ses erreurs ne sont pas enveloppées par SQLAlchemy.
+TRANSIENT_DB_ERRORS = (OperationalError, InterfaceError, psycopg2.OperationalError, psycopg2.InterfaceError)
+
+# Avis par requête INSERT groupée
+INSERT_BATCH_SIZE = 1000
+
+# À partir de ce nombre d'avis, chargement par COPY dans une table temporaire (voir benchmarks/bench_loader.py)
+COPY_MIN_ROWS = 5000
+
+# Colonnes du DataFrame nettoyé -> colonnes de la table reviews
+REVIEW_COLUMNS = {
+    'review_id': 'review_id',
+    'user_name': 'user_name',
+    'rating': 'rating',
+    'review_text': 'content',
+    'date_posted': 'posted_at',
+    'developer_reply': 'developer_reply',
+    'date_reply': 'replied_at',
+    'locale': 'locale',
+    # Doublons signalés par le cleaner (pipeline/dedup.py)
+    'content_hash': 'content_hash',
+    'duplicate_of': 'duplicate_of',
+    # Si le DataFrame a déjà les colonnes IA (scoring immédiat), on les prend
+    'sentiment_score': 'sentiment_score',
+    'category': 'category',
+    'is_processed': 'is_processed',
+    'model_version': 'model_version',
+}
+
 def save_backup_csv(df: pd.DataFrame, package_name: str):
     """
     Sauvegarde le DataFrame en CSV local si la DB plante.
@@ -24,65 +69,404 @@ def save_backup_csv(df: pd.DataFrame, package_name: str):
     except Exception as e:
         print(f"❌ [Loader] Echec critique : Impossible de sauvegarder le backup local : {e}")
 
-# ... (Garder la fonction get_or_create_app telle quelle) ...
-def get_or_create_app(session: Session, package_name: str, app_name: str = None) -> Application:
-    # (Copie le code précédent de cette fonction ici, rien ne change)
-    app = session.query(Application).filter_by(package_name=package_name).first()
-    if not app:
-        print(f"🆕 Nouvelle application détectée : {package_name}")
-        app = Application(package_name=package_name, name=app_name, last_scraped_at=datetime.utcnow())
-        session.add(app)
-        session.commit()
-        session.refresh(app)
-    else:
-        app.last_scraped_at = datetime.utcnow()
-        if app_name: app.name = app_name
-        session.commit()
-    return app
-
-def load_reviews_to_db(df: pd.DataFrame, package_name: str):
-    """
-    Tente d'insérer en base. Si ça échoue, sauvegarde en CSV local.
+# Marqueur dans le nom du fichier : lot à rejouer avec update_existing=True
+SPOOL_UPDATE_TAG = "update"
+
+def spool_dataframe(df: pd.DataFrame, package_name: str, update_existing: bool = False) -> str:
     """
-    if df.empty:
+    Met le lot de côté si la DB plante : Parquet compressé (typé, bien plus léger qu'un CSV),
+    ré-inséré plus tard par replay_spool() (avec le même update_existing, noté dans le nom).
+    """
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    mode = f"{SPOOL_UPDATE_TAG}__" if update_existing else ""
+    filename = f"{package_name}__{mode}{datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:6]}.parquet"
+    path = os.path.join(SPOOL_DIR, filename)
+
+    # Écriture puis renommage : le rejeu ne voit jamais un fichier à moitié écrit
+    df.to_parquet(path + ".tmp", index=False, compression="zstd")
+    os.replace(path + ".tmp", path)
+    print(f"⚠️ [Loader] Lot mis en attente ({len(df)} avis) : {path}")
+    return path
+
+def spooled_files() -> list:
+    """
+    Lots en attente, du plus ancien au plus récent (les fichiers déjà rejoués
+    entre-temps par un autre worker sont ignorés).
+    """
+    files = []
+    for path in glob.glob(os.path.join(SPOOL_DIR, "*.parquet")):
+        try:
+            files.append((os.path.getmtime(path), path))
+        except FileNotFoundError:
+            continue
+    return [path for _, path in sorted(files)]
+
+def set_aside(path: str, suffix: str):
+    """
+    Met un lot à l'écart du rejeu (renommé en .corrupt / .failed, à examiner à la main).
+    """
+    try:
+        os.replace(path, f"{path}.{suffix}")
+    except FileNotFoundError:
+        pass  # déjà rejoué par un autre worker
+
+def replay_spool() -> int:
+    """
+    Ré-insère les lots en attente (du plus ancien au plus récent) via le loader normal.
+    Un fichier n'est supprimé qu'une fois son lot commité. Si la base est toujours
+    indisponible (TRANSIENT_DB_ERRORS), on s'arrête au premier échec et l'erreur remonte
+    (l'appelant réessaie plus tard) ; un lot rejeté par la base (erreur permanente) est mis
+    à l'écart en .failed et le rejeu passe au suivant.
+    Renvoie le nombre de lots rejoués.
+    """
+    replayed = 0
+    for path in spooled_files():
+        try:
+            df = pd.read_parquet(path)
+        except FileNotFoundError:
+            continue  # déjà rejoué par un autre worker
+        except Exception as e:
+            print(f"❌ [Loader] Lot illisible mis à l'écart : {path} ({e})")
+            set_aside(path, "corrupt")
+            continue
+
+        package_name, *tags = os.path.basename(path).split("__")
+        update_existing = SPOOL_UPDATE_TAG in tags[:-1]
+        try:
+            load_reviews_to_db(df, package_name, update_existing=update_existing, spool_on_error=False)
+        except TRANSIENT_DB_ERRORS:
+            raise
+        except Exception as e:
+            print(f"❌ [Loader] Lot rejeté par la base, mis à l'écart : {path} ({e})")
+            set_aside(path, "failed")
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # déjà rejoué par un autre worker (insertion idempotente)
+        replayed += 1
+
+    return replayed
+
+# Cache du processus : package_name -> id de l'application
+_APP_IDS = {}
+
+def get_or_create_app(session: Session, package_name: str, app_name: str = None) -> int:
+    """
+    Id de l'application (créée si besoin) et mise à jour de last_scraped_at, en une requête
+    et sans commit : tout part dans la transaction de l'appelant.
+    Le nom n'est renseigné qu'à la création (ou s'il est vide) : il n'est jamais écrasé.
+    """
+    now = datetime.utcnow()
+
+    app_id = _APP_IDS.get(package_name)
+    if app_id is not None:
+        app_id = session.execute(
+            update(Application).where(Application.id == app_id)
+            .values(last_scraped_at=now).returning(Application.id)
+        ).scalar()
+        if app_id is not None:
+            return app_id
+        # App supprimée entre-temps (ou création annulée) : on la recrée
+        _APP_IDS.pop(package_name, None)
+
+    stmt = insert(Application).values(package_name=package_name, name=app_name or package_name, last_scraped_at=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['package_name'],
+        set_={'last_scraped_at': now, 'name': func.coalesce(func.nullif(Application.name, ''), stmt.excluded.name)}
+    )
+    app_id = session.execute(stmt.returning(Application.id)).scalar_one()
+    _APP_IDS[package_name] = app_id
+    return app_id
+
+def get_watermarks(package_name: str, default_locale: str = None) -> dict:
+    """
+    Curseur du scraping incrémental de cette app, par marché ({locale: date}) :
+    le scraping de chaque marché s'arrête à sa date.
+    Curseur enregistré par save_watermarks après le dernier parcours complet ; à défaut (marché
+    scrapé avant les curseurs), date du plus récent avis en base pour ce marché.
+    Les avis sans locale (antérieurs au multi-marchés) comptent pour `default_locale`.
+    """
+    db: Session = next(get_db())
+    try:
+        rows = db.query(Review.locale, func.max(Review.posted_at))\
+            .join(Application, Review.app_id == Application.id)\
+            .filter(Application.package_name == package_name)\
+            .group_by(Review.locale).all()
+        cursors = db.query(ScrapeCheckpoint.lang, ScrapeCheckpoint.country, ScrapeCheckpoint.watermark)\
+            .filter(ScrapeCheckpoint.package_name == package_name, ScrapeCheckpoint.watermark != None).all()
+    finally:
+        db.close()
+
+    watermarks = {}
+    for locale, posted_at in rows:
+        locale = locale or default_locale
+        if locale not in watermarks or posted_at > watermarks[locale]:
+            watermarks[locale] = posted_at
+    for lang, country, watermark in cursors:
+        watermarks[locale_key(lang, country)] = watermark
+    return watermarks
+
+def get_resume_points(package_name: str) -> dict:
+    """
+    Parcours incrémentaux interrompus de cette app, par marché ({locale: (jeton, date)}),
+    à reprendre avant de faire avancer leur curseur (voir collect_new_reviews).
+    """
+    db: Session = next(get_db())
+    try:
+        rows = db.query(ScrapeCheckpoint.lang, ScrapeCheckpoint.country,
+                        ScrapeCheckpoint.resume_token, ScrapeCheckpoint.resume_watermark)\
+            .filter(ScrapeCheckpoint.package_name == package_name, ScrapeCheckpoint.resume_token != None).all()
+    finally:
+        db.close()
+    return {locale_key(lang, country): (token, watermark) for lang, country, token, watermark in rows}
+
+def save_watermarks(package_name: str, cursors: dict):
+    """
+    Enregistre les curseurs incrémentaux ({(lang, country): (date, jeton de reprise, date en attente)},
+    voir collect_locales), à appeler une fois les avis en base.
+    """
+    if not cursors:
         return
 
+    db: Session = next(get_db())
+    try:
+        stmt = insert(ScrapeCheckpoint).values([
+            {'package_name': package_name, 'lang': lang, 'country': country, 'fetched': 0,
+             'watermark': watermark, 'resume_token': token, 'resume_watermark': pending}
+            for (lang, country), (watermark, token, pending) in cursors.items()
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=['package_name', 'country', 'lang'],
+            set_={'watermark': stmt.excluded.watermark, 'resume_token': stmt.excluded.resume_token,
+                  'resume_watermark': stmt.excluded.resume_watermark}
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+def get_checkpoint(package_name: str, lang: str, country: str) -> tuple:
+    """
+    Avancement du scraping d'historique : (jeton de la page suivante, avis déjà récupérés, terminé ?).
+    """
+    db: Session = next(get_db())
+    try:
+        checkpoint = db.query(ScrapeCheckpoint).filter_by(package_name=package_name, lang=lang, country=country).first()
+        if not checkpoint:
+            return None, 0, False
+        return checkpoint.token, checkpoint.fetched, checkpoint.completed_at is not None
+    finally:
+        db.close()
+
+def save_checkpoint(package_name: str, lang: str, country: str, token: str, fetched: int, done: bool = False):
+    """
+    Enregistre l'avancement après chaque page (à appeler une fois la page insérée en base).
+    """
+    db: Session = next(get_db())
+    try:
+        checkpoint = db.query(ScrapeCheckpoint).filter_by(package_name=package_name, lang=lang, country=country).first()
+        if not checkpoint:
+            checkpoint = ScrapeCheckpoint(package_name=package_name, lang=lang, country=country)
+            db.add(checkpoint)
+        checkpoint.token = token
+        checkpoint.fetched = fetched
+        checkpoint.completed_at = datetime.utcnow() if done else None
+        db.commit()
+    finally:
+        db.close()
+
+def drop_orphan_checkpoints(package_name: str):
+    """
+    Supprime l'avancement laissé par une app supprimée (sinon, à son retour, l'historique
+    serait considéré comme déjà récupéré).
+    """
+    db: Session = next(get_db())
+    try:
+        db.query(ScrapeCheckpoint).filter(
+            ScrapeCheckpoint.package_name == package_name,
+            ~db.query(Application).filter(Application.package_name == package_name).exists()
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+def prepare_reviews(df: pd.DataFrame, app_id: int) -> pd.DataFrame:
+    """
+    Colonnes de la table reviews. Un avis présent deux fois n'est gardé qu'une fois.
+    """
+    present = {src: dst for src, dst in REVIEW_COLUMNS.items() if src in df.columns}
+    frame = df.drop_duplicates(subset='review_id')[list(present)].rename(columns=present)
+    frame['app_id'] = app_id
+    frame['is_processed'] = frame['is_processed'].eq(True) if 'is_processed' in frame else False
+    return frame
+
+def frame_to_rows(frame: pd.DataFrame) -> list:
+    """
+    Lignes prêtes pour l'INSERT (NaN / NaT -> None).
+    """
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+def dataframe_to_rows(df: pd.DataFrame, app_id: int) -> list:
+    return frame_to_rows(prepare_reviews(df, app_id))
+
+def resolve_known_duplicates(db: Session, frame: pd.DataFrame, app_id: int) -> pd.DataFrame:
+    """
+    Doublons exacts d'avis chargés par un lot précédent : l'avis déjà en base reste la référence
+    (dans un même lot, c'est le premier, voir dedup.flag_duplicates).
+    """
+    if 'content_hash' not in frame.columns:
+        return frame
+    hashes = frame['content_hash'].dropna().unique().tolist()
+    if not hashes:
+        return frame
+
+    known = {}
+    for content_hash, review_id in db.query(Review.content_hash, Review.review_id).filter(
+        Review.app_id == app_id,
+        Review.content_hash.in_(hashes),
+        Review.duplicate_of == None
+    ).order_by(Review.id):
+        known.setdefault(content_hash, review_id)
+    if not known:
+        return frame
+
+    # Référence de chaque avis : l'avis en base, sinon celle calculée dans le lot...
+    reference = frame['content_hash'].map(known).fillna(frame['duplicate_of']).fillna(frame['review_id'])
+    # ... et les quasi-doublons suivent leur référence si elle a elle-même un original en base
+    reference = reference.map(dict(zip(frame['review_id'], reference))).fillna(reference)
+    frame['duplicate_of'] = reference.where(reference.ne(frame['review_id']), None)
+    return frame
+
+def upsert_reviews(db: Session, rows: list, update_existing: bool = False) -> tuple:
+    """
+    INSERT ... ON CONFLICT (review_id) par paquets de INSERT_BATCH_SIZE lignes.
+    - update_existing=False : les avis déjà en base sont ignorés (DO NOTHING).
+    - update_existing=True : les avis modifiés (texte, note, réponse du développeur) sont mis à jour ;
+      un texte modifié repasse par l'IA.
+    Renvoie (avis insérés, avis mis à jour).
+    """
+    inserted = updated = 0
+    for i in range(0, len(rows), INSERT_BATCH_SIZE):
+        stmt = insert(Review).values(rows[i:i + INSERT_BATCH_SIZE])
+        if update_existing:
+            new = stmt.excluded
+            text_changed = Review.content.is_distinct_from(new.content)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['review_id'],
+                set_={
+                    'content': new.content,
+                    'rating': new.rating,
+                    'posted_at': new.posted_at,
+                    'developer_reply': new.developer_reply,
+                    'replied_at': new.replied_at,
+                    'content_hash': case((text_changed, new.content_hash), else_=Review.content_hash),
+                    'duplicate_of': case((text_changed, new.duplicate_of), else_=Review.duplicate_of),
+                    'is_processed': case((text_changed, False), else_=Review.is_processed),
+                    'ai_status': case((text_changed, None), else_=Review.ai_status),
+                    'ai_attempts': case((text_changed, 0), else_=Review.ai_attempts),
+                },
+                # Pas d'écriture si rien n'a changé
+                where=or_(text_changed,
+                          Review.rating.is_distinct_from(new.rating),
+                          Review.developer_reply.is_distinct_from(new.developer_reply))
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=['review_id'])
+
+        # xmax = 0 : ligne nouvellement insérée (sinon : mise à jour)
+        flags = db.execute(stmt.returning(literal_column("xmax = 0"))).scalars().all()
+        inserted += sum(flags)
+        updated += len(flags) - sum(flags)
+    return inserted, updated
+
+def copy_reviews(db: Session, frame: pd.DataFrame) -> int:
+    """
+    Chargement massif : COPY FROM STDIN (CSV en mémoire) dans une table temporaire,
+    puis un seul INSERT ... SELECT ... ON CONFLICT DO NOTHING vers reviews.
+    Renvoie le nombre d'avis insérés.
+    """
+    columns = ", ".join(frame.columns)
+    buffer = io.StringIO()
+    frame.to_csv(buffer, header=False, index=False)  # None / NaN -> champ vide -> NULL
+    buffer.seek(0)
+
+    # Table temporaire propre à la transaction (ON COMMIT DROP) : rien à supprimer avant
+    db.execute(text(f"CREATE TEMP TABLE reviews_staging ON COMMIT DROP AS SELECT {columns} FROM reviews WITH NO DATA"))
+    cursor = db.connection().connection.cursor()
+    cursor.copy_expert(f"COPY reviews_staging ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+    # collected_at / ai_attempts : valeurs par défaut côté Python, à fournir explicitement ici
+    result = db.execute(text(
+        f"INSERT INTO reviews ({columns}, collected_at, ai_attempts) "
+        f"SELECT {columns}, timezone('utc', now()), 0 FROM reviews_staging "
+        f"ON CONFLICT (review_id) DO NOTHING"
+    ))
+    return result.rowcount
+
+def load_reviews_to_db(df: pd.DataFrame, package_name: str, update_existing: bool = False,
+                       method: str = None, spool_on_error: bool = True) -> int:
+    """
+    Tente d'insérer en base (doublons ignorés). Si la base est indisponible, le lot est mis
+    en attente dans SPOOL_DIR ; s'il est rejeté par la base (erreur permanente), il est
+    sauvegardé en CSV dans BACKUP_DIR (spool_on_error=False : l'erreur remonte à l'appelant).
+    update_existing=True : met aussi à jour les avis modifiés et les réponses du développeur.
+    method : "insert" (INSERT groupés), "copy" (COPY + table temporaire), ou None :
+    COPY à partir de COPY_MIN_ROWS avis (hors mise à jour), INSERT groupés sinon.
+    COPY n'insère que les nouveaux avis : avec update_existing=True, INSERT groupés dans tous les cas.
+    Renvoie le nombre d'avis réellement insérés, ou None si le lot n'est pas en base (mis en attente
+    ou sauvegardé en CSV) : l'appelant ne doit alors pas faire avancer ses curseurs / checkpoints.
+    """
+    if df.empty:
+        return 0
+    if method == "copy" and update_existing:
+        print("⚠️ [Loader] COPY ne met pas à jour les avis existants : chargement par INSERT groupés.")
+        method = "insert"
+
     # On utilise next(get_db()) pour avoir la session
     db: Session = next(get_db())
     
     try:
-        # 1. Logique d'insertion standard
-        app = get_or_create_app(db, package_name, app_name=package_name)
-        
-        new_count = 0
-        for _, row in df.iterrows():
-            exists = db.query(Review.review_id).filter_by(review_id=row['review_id']).first()
-            if not exists:
-                review = Review(
-                    app_id=app.id,
-                    review_id=row['review_id'],
-                    user_name=row['user_name'],
-                    rating=row['rating'],
-                    content=row['review_text'],
-                    posted_at=row['date_posted'],
-                    # Si le DataFrame a déjà les colonnes IA, on les prend, sinon None
-                    sentiment_score=row.get('sentiment_score'),
-                    category=row.get('category'),
-                    is_processed=row.get('is_processed', False)
-                )
-                db.add(review)
-                new_count += 1
+        # Application + avis + last_scraped_at : une seule transaction
+        app_id = get_or_create_app(db, package_name)
+
+        if method is None:
+            method = "copy" if len(df) >= COPY_MIN_ROWS and not update_existing else "insert"
+
+        # 1. Insertion groupée
+        frame = resolve_known_duplicates(db, prepare_reviews(df, app_id), app_id)
+        if method == "copy":
+            inserted, updated = copy_reviews(db, frame), 0
+        else:
+            inserted, updated = upsert_reviews(db, frame_to_rows(frame), update_existing)
         
+        if inserted or updated:
+            # Réveille l'ai-engine : la notification part au moment du commit
+            db.execute(text("SELECT pg_notify(:channel, :payload)"),
+                       {"channel": NEW_REVIEWS_CHANNEL, "payload": package_name})
+
         db.commit()
-        print(f"✅ [DB] {new_count} nouveaux avis insérés.")
+        print(f"✅ [DB] {inserted} nouveaux avis insérés" + (f", {updated} mis à jour." if updated else "."))
+        return inserted
 
     except Exception as e:
         db.rollback()
         print(f"❌ [DB Error] Impossible d'écrire en base : {e}")
-        
-        # C'est ICI que le dossier data/processed intervient !
-        print("🚑 Tentative de sauvegarde locale (Backup)...")
-        save_backup_csv(df, package_name)
+        if not spool_on_error:
+            raise
+        if not isinstance(e, TRANSIENT_DB_ERRORS):
+            # Le rejeu échouerait à chaque fois : sauvegarde locale, à examiner à la main
+            print("🚑 Lot rejeté par la base, sauvegarde locale (Backup)...")
+            save_backup_csv(df, package_name)
+            return None
+
+        print("🚑 Mise en attente du lot (rejoué automatiquement)...")
+        try:
+            spool_dataframe(df, package_name, update_existing)
+        except Exception as spool_error:
+            # Dernier recours : CSV dans data/processed
+            print(f"❌ [Loader] Mise en attente impossible : {spool_error}")
+            save_backup_csv(df, package_name)
+        return None
         
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -0,0 +1,56 @@
+import json
+import configparser
+import urllib.request
+import pandas as pd
+
+# --- CHARGEMENT CONFIGURATION ---
+config = configparser.ConfigParser()
+config.read('config/settings.ini')
+SCORING_URL = config.get('AI_ENGINE', 'scoring_url', fallback='http://127.0.0.1:8765')
+SCORING_TIMEOUT = config.getfloat('AI_ENGINE', 'timeout', fallback=3)
+MAX_SYNC_REVIEWS = config.getint('AI_ENGINE', 'max_sync_reviews', fallback=500)
+
+def score_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Note immédiatement un petit lot d'avis via le service de scoring de l'ai-engine.
+    Si le service est absent, lent ou en erreur, le DataFrame est renvoyé tel quel :
+    les avis seront notés plus tard par les workers (file asynchrone).
+    """
+    if df.empty or len(df) > MAX_SYNC_REVIEWS:
+        return df
+
+    payload = {"reviews": [
+        {"text": text, "rating": None if pd.isna(rating) else int(rating)}
+        for text, rating in zip(df['review_text'], df['rating'])
+    ]}
+    request = urllib.request.Request(
+        f"{SCORING_URL}/score",
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"}
+    )
+
+    try:
+        with urllib.request.urlopen(request, timeout=SCORING_TIMEOUT) as response:
+            data = json.loads(response.read())
+
+        results = data["results"]
+        if len(results) != len(df):
+            raise ValueError(f"{len(results)} résultats pour {len(df)} avis")
+        scored = [r["sentiment_score"] is not None for r in results]
+        # dtype object : un avis non noté doit rester None (et pas NaN) en base
+        sentiment_scores = pd.Series([r["sentiment_score"] for r in results], index=df.index, dtype=object)
+        categories = pd.Series([r["category"] for r in results], index=df.index, dtype=object)
+        model_versions = pd.Series([data["model_version"] if ok else None for ok in scored],
+                                   index=df.index, dtype=object)
+    except Exception as e:
+        print(f"⚠️ [Scoring] Service indisponible ou réponse invalide ({e}) : analyse différée aux workers.")
+        return df
+
+    df = df.copy()
+    df['sentiment_score'] = sentiment_scores
+    df['category'] = categories
+    df['is_processed'] = scored
+    df['model_version'] = model_versions
+
+    print(f"🧠 [Scoring] {sum(scored)}/{len(df)} avis notés immédiatement.")
+    return df
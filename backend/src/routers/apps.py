@@ -4,12 +4,13 @@ from sqlalchemy.orm import Session
 from google_play_scraper import search
 
 from src.database.db_manager import get_db
-from src.database.models import Application, Review
+from src.database.models import Application, Review, ScrapeCheckpoint
 from src.schemas import AppRequest
-from src.scraper.scraper_module import collect_reviews
-from src.pipeline.loader import load_reviews_to_db
+from src.scraper.scraper_module import LOCALES, collect_reviews
+from src.pipeline.loader import drop_orphan_checkpoints, load_reviews_to_db
 from src.pipeline.cleaner import process_dataframe
-from src.tasks import task_scrape_full_history
+from src.pipeline.scorer import score_dataframe
+from src.tasks import task_scrape_full_history, task_refresh_app
 
 router = APIRouter(
     tags=["Applications"]
@@ -94,10 +95,23 @@ def delete_application(id: int, db: Session = Depends(get_db)):
     if not app:
         raise HTTPException(status_code=404, detail="App not found")
     
+    # Avancement du scraping supprimé aussi : si l'app revient, tout l'historique est re-scrapé
+    db.query(ScrapeCheckpoint).filter(ScrapeCheckpoint.package_name == app.package_name)\
+        .delete(synchronize_session=False)
     db.delete(app)
     db.commit()
     return {"message": "App deleted"}
 
+@router.post("/applications/{id}/refresh")
+def refresh_application(id: int, db: Session = Depends(get_db)):
+    """Récupère en arrière-plan les avis publiés depuis le dernier scraping."""
+    app = db.query(Application).filter(Application.id == id).first()
+    if not app:
+        raise HTTPException(status_code=404, detail="App not found")
+
+    task_refresh_app.delay(app.package_name)
+    return {"message": "Refresh started", "app": app.package_name}
+
 @router.get("/applications/{id}/comments")
 def get_application_comments(id: int, limit: int = 100, db: Session = Depends(get_db)):
     """Tous les commentaires de cette app."""
@@ -143,13 +157,23 @@ def add_application(request: AppRequest):
     # ... logic ...
     # (Copying the logic back in or wrapping it)
     print(f"🌍 [API] Entrée reçue : {raw_input}")
+    # Seuls les marchés configurés (LOCALES) sont scrapés et suivis ensuite par les workers
+    locale = next(((l, c) for l, c in LOCALES if c.lower() == request.country.lower()), None)
+    if locale is None:
+        markets = ", ".join(dict.fromkeys(c.lower() for _, c in LOCALES))
+        raise HTTPException(status_code=400,
+                            detail=f"Pays '{request.country}' non suivi. Pays configurés : {markets}.")
+    lang, country = locale
     try:
         app_id = resolve_app_id(raw_input)
         print(f"⏳ [API] Scraping rapide pour l'ID : {app_id}")
-        df = collect_reviews(app_id, count=request.count, country=request.country)
+        df = collect_reviews(app_id, lang=lang, country=country, count=request.count)
         if df.empty:
              raise HTTPException(status_code=404, detail=f"Impossible de scraper l'application {app_id}.")
         df = process_dataframe(df)
+        # Scoring immédiat (sinon les avis apparaissent sans sentiment jusqu'au passage des workers)
+        df = score_dataframe(df)
+        drop_orphan_checkpoints(app_id)  # app supprimée avant le nettoyage des checkpoints
         load_reviews_to_db(df, package_name=app_id)
         task_scrape_full_history.delay(app_id)
         return {"status": "success", "message": f"App added: {app_id}", "resolved_id": app_id}
@@ -144,6 +144,7 @@ def send_message(conversation_id: int, data: MessageCreate, current_user: User =
     reviews = db.query(Review.content)\
         .filter(Review.app_id == conv.app_id)\
         .filter(Review.content != None)\
+        .filter(Review.duplicate_of == None)\
         .order_by(Review.posted_at.desc())\
         .limit(50)\
         .all()
@@ -206,6 +207,7 @@ def chat_with_data(request: ChatRequest, db: Session = Depends(get_db)):
     reviews = db.query(Review.content)\
         .filter(Review.app_id == app.id)\
         .filter(Review.content != None)\
+        .filter(Review.duplicate_of == None)\
         .order_by(Review.posted_at.desc())\
         .limit(50)\
         .all()
@@ -0,0 +1,98 @@
+import os
+import gzip
+import json
+import random
+import hashlib
+from datetime import datetime, timedelta
+
+# Dossier des réponses enregistrées (une page par fichier JSON compressé)
+FIXTURES_DIR = os.getenv("SCRAPER_FIXTURES_DIR", "data/fixtures")
+
+# Mode "synthetic" : nombre d'avis générés par app et par marché
+SYNTHETIC_REVIEWS = int(os.getenv("SYNTHETIC_REVIEWS", 20000))
+
+# Mode "synthetic" : jetons des pages dont la récupération échoue une fois (simule un 429 ou un
+# délai dépassé), ex. SYNTHETIC_FAILURES="398,995". Le jeton de la première page est "first".
+SYNTHETIC_FAILURES = set(filter(None, os.getenv("SYNTHETIC_FAILURES", "").replace(" ", "").split(",")))
+
+# Champs datés des avis google_play_scraper (à (dé)sérialiser)
+DATE_FIELDS = ('at', 'repliedAt')
+
+def page_path(app_id: str, lang: str, country: str, token: str = None) -> str:
+    """
+    Fichier d'une page : une page est identifiée par le jeton qui permet de l'obtenir.
+    """
+    name = hashlib.sha1((token or "first").encode("utf-8")).hexdigest()[:16]
+    return os.path.join(FIXTURES_DIR, app_id, f"{lang}_{country}", f"{name}.json.gz")
+
+def save_page(app_id: str, lang: str, country: str, token: str, page: list, next_token: str):
+    """
+    Mode "record" : enregistre une réponse brute du Play Store.
+    """
+    path = page_path(app_id, lang, country, token)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    reviews = [
+        {k: v.isoformat() if k in DATE_FIELDS and v else v for k, v in review.items()}
+        for review in page
+    ]
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump({"reviews": reviews, "next_token": next_token}, f, ensure_ascii=False)
+
+def load_page(app_id: str, lang: str, country: str, token: str = None) -> tuple:
+    """
+    Mode "replay" : relit une page enregistrée. Même retour que fetch_review_page.
+    """
+    path = page_path(app_id, lang, country, token)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Pas de page enregistrée pour {app_id} [{lang}_{country}] : {path}")
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        data = json.load(f)
+    for review in data["reviews"]:
+        for k in DATE_FIELDS:
+            if review.get(k):
+                review[k] = datetime.fromisoformat(review[k])
+    return data["reviews"], data["next_token"]
+
+# Vocabulaire des avis synthétiques (longueurs variées, quelques avis identiques comme sur le store)
+SYNTHETIC_PHRASES = [
+    "Super application", "Nul", "Très bien", "Top", "L'application plante depuis la dernière mise à jour",
+    "Trop de pubs, impossible de regarder une vidéo sans interruption", "Merci pour le mode sombre",
+    "Impossible de me connecter, le code de vérification n'arrive jamais",
+    "L'abonnement est beaucoup trop cher pour ce que c'est", "Great app", "Keeps crashing after update",
+    "Please add an option to export my data", "Lente et pleine de bugs", "👍", "Bof",
+]
+
+def synthetic_page(app_id: str, lang: str, country: str, token: str = None, count: int = 200,
+                   total: int = None) -> tuple:
+    """
+    Mode "synthetic" : génère une page d'avis (déterministe) pour n'importe quel volume,
+    au même format que google_play_scraper. Le jeton est la position dans l'historique.
+    Une page listée dans SYNTHETIC_FAILURES lève une erreur (une fois), comme fetch_review_page en direct.
+    """
+    if (token or "first") in SYNTHETIC_FAILURES:
+        SYNTHETIC_FAILURES.discard(token or "first")
+        raise ConnectionError(f"Échec simulé de la page {token or 'first'} pour {app_id} [{lang}_{country}]")
+
+    total = total or SYNTHETIC_REVIEWS
+    offset = int(token) if token else 0
+    rng = random.Random(f"{app_id}:{lang}:{country}:{offset}")
+    newest = datetime(2025, 1, 1)
+    page = []
+    for i in range(offset, min(offset + count, total)):
+        text = " ".join(rng.choice(SYNTHETIC_PHRASES) for _ in range(rng.choice([1, 1, 1, 2, 3, 6])))
+        replied = rng.random() < 0.1
+        page.append({
+            "reviewId": f"synthetic:{app_id}:{lang}_{country}:{i}",
+            "userName": f"Utilisateur {rng.randint(1, 10 ** 6)}",
+            "userImage": None,
+            "content": text,
+            "score": rng.choices([1, 2, 3, 4, 5], [0.2, 0.08, 0.1, 0.17, 0.45])[0],
+            "thumbsUpCount": rng.randint(0, 50),
+            "reviewCreatedVersion": "1.0.0",
+            "at": newest - timedelta(minutes=7 * i),
+            "replyContent": "Merci pour votre retour !" if replied else None,
+            "repliedAt": newest - timedelta(minutes=7 * i - 60) if replied else None,
+            "appVersion": "1.0.0",
+        })
+    next_token = str(offset + count) if offset + count < total else None
+    return page, next_token
@@ -1,46 +1,270 @@
+import os
+import threading
+import time
+import configparser
 import pandas as pd
-from google_play_scraper import Sort, reviews
+from concurrent.futures import ThreadPoolExecutor
+from google_play_scraper import Sort
+from google_play_scraper.constants.element import ElementSpecs
+from google_play_scraper.constants.request import Formats
+from google_play_scraper.features.reviews import _fetch_review_items
 from datetime import datetime
+from src.scraper import fixtures
+
+# --- CHARGEMENT CONFIGURATION ---
+config = configparser.ConfigParser()
+config.read('config/settings.ini')
+
+# Avis par page : Google Play en renvoie au plus 199 par requête HTTP
+# (au-delà, google_play_scraper enchaîne une 2e requête pour le reste de la page)
+PAGE_SIZE = 199
+
+# "live" (Play Store), "record" (Play Store + enregistrement des réponses dans fixtures.FIXTURES_DIR),
+# "replay" (réponses enregistrées, hors-ligne) ou "synthetic" (avis générés, hors-ligne)
+SCRAPER_MODE = os.getenv("SCRAPER_MODE", "live")
+
+class TokenBucket:
+    """
+    Limiteur de débit (seau à jetons) partagé entre threads : `rate` requêtes/s en moyenne,
+    avec des rafales jusqu'à `burst` requêtes.
+    """
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, n: int = 1):
+        n = min(n, self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                wait = (n - self.tokens) / self.rate
+            time.sleep(wait)
+
+# Un seul hôte (play.google.com) : un seul limiteur pour tout le processus
+PLAY_STORE_LIMITER = TokenBucket(
+    rate=config.getfloat('SCRAPER', 'requests_per_second', fallback=5),
+    burst=config.getint('SCRAPER', 'burst', fallback=10)
+)
+
+def locale_key(lang: str, country: str) -> str:
+    return f"{lang}_{country.upper()}"
+
+def parse_locales(value: str) -> list:
+    """
+    "fr:fr, en:us" -> [('fr', 'fr'), ('en', 'us')]
+    """
+    return [tuple(item.strip().split(':')) for item in value.split(',') if item.strip()]
+
+# Marchés scrapés (le premier fait foi pour les doublons)
+LOCALES = parse_locales(config.get('SCRAPER', 'locales', fallback=(
+    f"{config.get('SCRAPER', 'language', fallback='fr')}:{config.get('SCRAPER', 'country', fallback='fr')}"
+)))
+DEFAULT_LOCALE = locale_key(*LOCALES[0])
+
+def reviews_to_dataframe(result: list, lang: str, country: str) -> pd.DataFrame:
+    """
+    Convertit les avis bruts de google_play_scraper en DataFrame (colonnes du pipeline).
+    """
+    df = pd.DataFrame(result)
+
+    # Sélection et renommage
+    cols_to_keep = ['reviewId', 'userName', 'content', 'score', 'at', 'replyContent', 'repliedAt']
+    existing_cols = [c for c in cols_to_keep if c in df.columns]
+    df = df[existing_cols]
+
+    df = df.rename(columns={
+        'reviewId': 'review_id',
+        'userName': 'user_name',
+        'content': 'review_text',
+        'score': 'rating',
+        'at': 'date_posted',
+        'replyContent': 'developer_reply',
+        'repliedAt': 'date_reply'
+    })
+
+    df['date_posted'] = pd.to_datetime(df['date_posted'])
+    df['locale'] = locale_key(lang, country)
+    return df
 
 # LE NOM DE LA FONCTION DOIT ÊTRE EXACTEMENT CELUI-CI :
 def collect_reviews(app_id: str, lang: str = 'fr', country: str = 'fr', count: int = 1000) -> pd.DataFrame:
     print(f"--- 📥 Démarrage du scraping pour : {app_id} ---")
     
     try:
-        result, _ = reviews(
-            app_id,
-            lang=lang,
-            country=country,
-            sort=Sort.NEWEST,
-            count=count
-        )
-
-        if not result:
+        frames = [df for df, _ in iter_review_pages(app_id, lang, country, max_count=count)]
+
+        if not frames:
             print(f"⚠️ Aucun avis trouvé pour {app_id}.")
             return pd.DataFrame()
 
-        df = pd.DataFrame(result)
-
-        # Sélection et renommage
-        cols_to_keep = ['reviewId', 'userName', 'content', 'score', 'at', 'replyContent', 'repliedAt']
-        existing_cols = [c for c in cols_to_keep if c in df.columns]
-        df = df[existing_cols]
-
-        df = df.rename(columns={
-            'reviewId': 'review_id',
-            'userName': 'user_name',
-            'content': 'review_text',
-            'score': 'rating',
-            'at': 'date_posted',
-            'replyContent': 'developer_reply',
-            'repliedAt': 'date_reply'
-        })
-
-        df['date_posted'] = pd.to_datetime(df['date_posted'])
+        df = pd.concat(frames, ignore_index=True)
         
         print(f"✅ Succès : {len(df)} avis récupérés pour {app_id}.")
         return df
 
     except Exception as e:
         print(f"❌ Erreur critique lors du scraping de {app_id} : {e}")
-        return pd.DataFrame()
\ No newline at end of file
+        return pd.DataFrame()
+
+def fetch_review_page(app_id: str, lang: str = 'fr', country: str = 'fr', token: str = None,
+                      count: int = PAGE_SIZE) -> tuple:
+    """
+    Une page d'avis Sort.NEWEST, à partir d'un jeton de pagination sauvegardé (None : première page).
+    Renvoie (avis bruts, jeton de la page suivante ou None s'il n'y en a plus).
+    """
+    if SCRAPER_MODE == "replay":
+        return fixtures.load_page(app_id, lang, country, token)
+    if SCRAPER_MODE == "synthetic":
+        return fixtures.synthetic_page(app_id, lang, country, token, count)
+
+    page, next_token = _fetch_play_store_page(app_id, lang, country, token, count)
+    if SCRAPER_MODE == "record":
+        fixtures.save_page(app_id, lang, country, token, page, next_token)
+    return page, next_token
+
+def _fetch_play_store_page(app_id: str, lang: str, country: str, token: str, count: int) -> tuple:
+    """
+    Requêtes Play Store d'une page. Contrairement à google_play_scraper.reviews(), qui avale
+    les erreurs (429, délai dépassé...) et renvoie alors une page tronquée sans jeton, toute
+    erreur remonte : une page sans jeton suivant est donc bien la dernière.
+    """
+    url = Formats.Reviews.build(lang=lang, country=country)
+    page = []
+    while len(page) < count:
+        # Un jeton du limiteur par requête HTTP
+        PLAY_STORE_LIMITER.acquire()
+        # API privée de google-play-scraper (version épinglée dans requirements.txt) : à revérifier
+        # à chaque montée de version (signature, format du jeton)
+        items, token = _fetch_review_items(url, app_id, Sort.NEWEST.value, min(count - len(page), PAGE_SIZE),
+                                           None, None, token)
+        page.extend({k: spec.extract_content(item) for k, spec in ElementSpecs.Review.items()} for item in items)
+        if isinstance(token, list):
+            token = None  # fin des avis (même convention que google_play_scraper)
+        if token is None or not items:
+            break
+    return page, token
+
+def iter_review_pages(app_id: str, lang: str = 'fr', country: str = 'fr', token: str = None,
+                      since: datetime = None, max_count: int = None):
+    """
+    Générateur : une DataFrame par page Sort.NEWEST (PAGE_SIZE avis), avec le jeton de la page suivante.
+    Une seule page en mémoire à la fois, quelle que soit la taille de l'historique.
+    S'arrête à la fin des avis, après `max_count` avis, ou au premier avis plus ancien que `since`.
+    """
+    fetched = 0
+    while max_count is None or fetched < max_count:
+        page, token = fetch_review_page(app_id, lang, country, token)
+
+        # ">=" : les avis postés à la même seconde que le dernier connu sont re-vérifiés
+        # (les doublons sont ignorés à l'insertion)
+        fresh = [r for r in page if since is None or r['at'] >= since]
+        if max_count is not None:
+            fresh = fresh[:max_count - fetched]
+        fetched += len(fresh)
+
+        if fresh:
+            yield reviews_to_dataframe(fresh, lang, country), token
+
+        # Avis déjà connus (ou limite) atteints, ou plus de pages : seul un jeton absent marque
+        # la fin de l'historique (une erreur de récupération remonte, voir fetch_review_page)
+        if len(fresh) < len(page) or token is None:
+            break
+
+def collect_new_reviews(app_id: str, since: datetime = None, lang: str = 'fr', country: str = 'fr',
+                        max_count: int = 20000, resume: tuple = None) -> tuple:
+    """
+    Scraping incrémental : parcourt les pages Sort.NEWEST (du plus récent au plus ancien)
+    et s'arrête dès qu'on atteint un avis plus ancien que `since` (le curseur du marché).
+    Sans `since` (app jamais scrapée), récupère jusqu'à `max_count` avis.
+    `resume` : (jeton, date du plus récent avis) d'un parcours interrompu, repris à ce jeton.
+    Renvoie (avis, curseur) avec curseur = (date, jeton de reprise, date en attente) :
+    - parcours complet jusqu'à `since` : (date du plus récent avis vu, None, None) ;
+    - parcours interrompu (erreur, ou `max_count` atteint avant `since`) : (`since`, jeton de la
+      page où reprendre, date du plus récent avis vu) : le prochain passage reprend à ce jeton
+      jusqu'à `since`, et c'est alors seulement que le curseur avance ;
+    - premier passage interrompu par une erreur : None (pas de curseur).
+    """
+    token, newest = resume or (None, None)
+    resuming = ", reprise d'un parcours interrompu" if token else ""
+    print(f"--- 📥 Scraping incrémental de {app_id} [{locale_key(lang, country)}] "
+          f"(depuis : {since or 'le début'}{resuming}) ---")
+
+    frames = []
+    # Jeton de la dernière page lue (à relire si elle a été tronquée par max_count) et de la suivante
+    page_token = next_token = token
+    failed = False
+    try:
+        for df, next_page in iter_review_pages(app_id, lang, country, token=token, since=since,
+                                               max_count=max_count):
+            frames.append(df)
+            page_token, next_token = next_token, next_page
+
+    except Exception as e:
+        print(f"❌ Erreur lors du scraping de {app_id} (page {len(frames) + 1}) : {e}")
+        if since is None and not frames:
+            return pd.DataFrame(), None
+        failed = True
+
+    if token and not frames and not failed:
+        # Jeton de reprise expiré : on repart du plus récent avis (les doublons sont ignorés à l'insertion)
+        print(f"⚠️ Jeton de reprise invalide pour {app_id} [{locale_key(lang, country)}], reprise depuis le début.")
+        return collect_new_reviews(app_id, since, lang, country, max_count)
+
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if frames:
+        newest = newest or df['date_posted'].max().to_pydatetime()
+        print(f"✅ Succès : {len(df)} nouveaux avis récupérés pour {app_id} ({len(frames)} page(s)).")
+    else:
+        print(f"✅ Aucun nouvel avis pour {app_id}.")
+
+    if since is None:
+        # Premier passage : les `max_count` avis les plus récents, l'historique est récupéré à part
+        return df, (newest, None, None) if newest and not failed else None
+    if failed:
+        print(f"⚠️ {app_id} [{locale_key(lang, country)}] : parcours interrompu, reprise au prochain passage.")
+        return df, (since, next_token, newest)
+    if len(df) >= max_count:
+        print(f"⚠️ {app_id} [{locale_key(lang, country)}] : limite de {max_count} avis atteinte avant le dernier "
+              f"avis connu, suite au prochain passage.")
+        return df, (since, page_token, newest)
+    return df, (newest or since, None, None)
+
+def collect_locales(app_id: str, locales: list = LOCALES, watermarks: dict = None,
+                    max_count: int = 20000, resume_points: dict = None) -> tuple:
+    """
+    Scraping incrémental de plusieurs marchés en parallèle, fusionnés en un seul DataFrame.
+    Chaque marché s'arrête à son propre curseur (`watermarks` : {locale: date}) et reprend
+    son parcours interrompu s'il y en a un (`resume_points` : {locale: (jeton, date)}).
+    Un même avis peut remonter dans plusieurs marchés : on ne garde que le premier (ordre de `locales`).
+    Renvoie (avis, nouveaux curseurs {(lang, country): (date, jeton, date en attente)}) : les curseurs
+    sont à enregistrer (loader.save_watermarks) une fois les avis en base.
+    """
+    watermarks = watermarks or {}
+    resume_points = resume_points or {}
+    with ThreadPoolExecutor(max_workers=len(locales)) as pool:
+        results = list(pool.map(
+            lambda locale: collect_new_reviews(app_id, since=watermarks.get(locale_key(*locale)),
+                                               lang=locale[0], country=locale[1], max_count=max_count,
+                                               resume=resume_points.get(locale_key(*locale))),
+            locales
+        ))
+
+    # Curseurs calculés avant la fusion : un marché dont les avis remontent aussi ailleurs avance quand même
+    cursors = {tuple(locale): cursor for locale, (_, cursor) in zip(locales, results) if cursor is not None}
+    frames = [df for df, _ in results if not df.empty]
+    if not frames:
+        return pd.DataFrame(), cursors
+
+    df = pd.concat(frames, ignore_index=True)
+    merged = df.drop_duplicates(subset='review_id', keep='first')
+    if len(merged) < len(df):
+        print(f"🔁 {app_id} : {len(df) - len(merged)} doublons entre marchés ignorés.")
+    return merged, cursors
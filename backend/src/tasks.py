@@ -1,7 +1,9 @@
 import os
+import json
 from celery import Celery
-from src.scraper.scraper_module import collect_reviews
-from src.pipeline.loader import load_reviews_to_db
+from src.scraper.scraper_module import DEFAULT_LOCALE, LOCALES, collect_locales, iter_review_pages
+from src.pipeline.loader import (SPOOL_DIR, get_checkpoint, get_resume_points, get_watermarks,
+                                 load_reviews_to_db, replay_spool, save_checkpoint, save_watermarks)
 from src.pipeline.cleaner import process_dataframe # <--- Module de nettoyage
 import configparser 
 
@@ -11,6 +13,17 @@ config = configparser.ConfigParser()
 config.read('config/settings.ini')
 HISTORY_LIMIT = int(config['LIMITS']['history_count']) # Récupère 5000
 
+# Taille max de l'historique (on peut l'augmenter pour la production)
+FULL_HISTORY_COUNT = 20000
+
+# Rejeu des lots mis en attente après une panne de la base (secondes)
+SPOOL_REPLAY_INTERVAL = 600
+
+# Base toujours indisponible : passages beat sautés après chaque échec (0, 1, 3, 7... soit 10 min,
+# 20, 40... jusqu'à 6 h entre deux essais), état partagé par les workers à côté du spool
+SPOOL_MAX_SKIPPED_RUNS = 35
+SPOOL_BACKOFF_FILE = os.path.join(SPOOL_DIR, ".backoff.json")
+
 # Configuration Redis
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
 
@@ -26,29 +39,139 @@ celery_app.conf.update(
     result_serializer='json',
     timezone='Africa/Douala',
     enable_utc=True,
+    # Tâches périodiques (celery -A src.tasks beat)
+    beat_schedule={
+        'replay-spool': {'task': 'replay_spool', 'schedule': SPOOL_REPLAY_INTERVAL},
+    },
 )
 
-@celery_app.task(name="scrape_full_history")
-def task_scrape_full_history(app_id: str):
+def scrape_locale_history(app_id: str, lang: str, country: str) -> int:
+    """
+    Historique d'un marché, page par page. Chaque page est chargée dès sa réception, puis
+    l'avancement (jeton de pagination) est enregistré : un appel relancé reprend là où le
+    précédent s'est arrêté (au pire une page est re-téléchargée, les doublons sont ignorés).
+    Une page qui n'a pas pu être mise en base (mise en attente ou en CSV) arrête le parcours sans
+    checkpoint : l'erreur remonte et la tâche Celery réessaie depuis la dernière page enregistrée.
+    Renvoie le nombre d'avis récupérés pour ce marché.
+    """
+    token, fetched, done = get_checkpoint(app_id, lang, country)
+    if not done and fetched and (token is None or fetched >= FULL_HISTORY_COUNT):
+        # Dernière page (ou limite) atteinte, mais arrêt juste avant l'enregistrement de done=True
+        save_checkpoint(app_id, lang, country, None, fetched, done=True)
+        done = True
+    if done:
+        print(f"👷 [Worker] Historique {lang}_{country.upper()} déjà récupéré pour {app_id} ({fetched} avis).")
+        return fetched
+
+    if token:
+        print(f"👷 [Worker] Reprise du scraping complet de {app_id} [{lang}_{country.upper()}] après {fetched} avis...")
+    else:
+        print(f"👷 [Worker] Scraping complet démarré pour {app_id} [{lang}_{country.upper()}]...")
+
+    resumed = token is not None
+    while True:
+        # Flux page par page : mémoire constante, premiers avis visibles en quelques secondes
+        pages = iter_review_pages(app_id, lang, country, token=token, max_count=FULL_HISTORY_COUNT - fetched)
+        loaded_any = False
+        for df, token in pages:
+            loaded_any = True
+            # 1. NETTOYAGE  2. INSERTION  3. CHECKPOINT (une fois la page en base)
+            if load_reviews_to_db(process_dataframe(df), package_name=app_id) is None:
+                raise RuntimeError(f"Avis de {app_id} [{lang}_{country.upper()}] non enregistrés en base")
+            fetched += len(df)
+            save_checkpoint(app_id, lang, country, token, fetched)
+
+        if loaded_any or not resumed:
+            break
+        # Jeton sauvegardé expiré : on repart du début (les doublons sont ignorés à l'insertion)
+        print(f"⚠️ [Worker] Jeton de reprise invalide pour {app_id}, reprise depuis le début.")
+        token, fetched, resumed = None, 0, False
+
+    save_checkpoint(app_id, lang, country, None, fetched, done=True)
+    return fetched
+
+@celery_app.task(name="scrape_full_history", bind=True, max_retries=5,
+                 # Si le worker meurt en cours de route, la tâche est relivrée (et reprend au checkpoint)
+                 acks_late=True, reject_on_worker_lost=True)
+def task_scrape_full_history(self, app_id: str):
+    """
+    Worker : Récupère l'historique lourd de chaque marché configuré, NETTOIE, et sauvegarde.
+    """
+    try:
+        fetched = sum(scrape_locale_history(app_id, lang, country) for lang, country in LOCALES)
+        return f"Succès : {fetched} avis récupérés pour {app_id}"
+
+    except Exception as e:
+        print(f"❌ Erreur Worker : {e}")
+        raise self.retry(exc=e, countdown=60)
+
+@celery_app.task(name="refresh_app")
+def task_refresh_app(app_id: str):
     """
-    Worker : Récupère l'historique lourd, NETTOIE, et sauvegarde.
+    Worker : Récupère uniquement les avis publiés depuis le dernier scraping (une page ou deux en général).
     """
-    print(f"👷 [Worker] Scraping complet démarré pour {app_id}...")
-    
+    print(f"👷 [Worker] Rafraîchissement de {app_id}...")
+
     try:
-        # On peut augmenter le nombre ici pour la production
-        df = collect_reviews(app_id, count=20000)
-        
+        # Tous les marchés en parallèle, chacun depuis son propre curseur, doublons fusionnés
+        df, cursors = collect_locales(app_id, watermarks=get_watermarks(app_id, DEFAULT_LOCALE),
+                                      max_count=HISTORY_LIMIT, resume_points=get_resume_points(app_id))
+
+        inserted = 0
         if not df.empty:
-            # 1. NETTOYAGE
-            df = process_dataframe(df)
+            # Un avis modifié remonte en tête de Sort.NEWEST : texte, note et réponse du développeur mis à jour
+            inserted = load_reviews_to_db(process_dataframe(df), package_name=app_id, update_existing=True)
+        if inserted is None:
+            # Lot mis en attente (ou en CSV) : curseurs inchangés, le prochain passage relit ces avis
+            return f"Erreur : avis de {app_id} non enregistrés en base"
+        # Les curseurs n'avancent qu'une fois les avis en base
+        save_watermarks(app_id, cursors)
 
-            # 2. INSERTION
-            load_reviews_to_db(df, package_name=app_id)
-            return f"Succès : {len(df)} avis nettoyés et insérés pour {app_id}"
-        
-        return f"Aucun avis trouvé pour {app_id}"
+        if not df.empty:
+            return f"Succès : {inserted} nouveaux avis pour {app_id}"
+        return f"Aucun nouvel avis pour {app_id}"
 
     except Exception as e:
         print(f"❌ Erreur Worker : {e}")
-        return f"Erreur : {str(e)}"
\ No newline at end of file
+        return f"Erreur : {str(e)}"
+
+def read_spool_backoff() -> dict:
+    """
+    Recul du rejeu : {"failures": échecs consécutifs, "skip": passages beat encore à sauter}.
+    """
+    try:
+        with open(SPOOL_BACKOFF_FILE) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"failures": 0, "skip": 0}
+
+def write_spool_backoff(state: dict):
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    with open(SPOOL_BACKOFF_FILE + ".tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(SPOOL_BACKOFF_FILE + ".tmp", SPOOL_BACKOFF_FILE)
+
+@celery_app.task(name="replay_spool")
+def task_replay_spool():
+    """
+    Worker (lancé par beat toutes les SPOOL_REPLAY_INTERVAL secondes) : Ré-insère les lots mis en
+    attente pendant une panne de la base. Si la base est toujours indisponible, les passages suivants
+    sont sautés, de plus en plus longtemps (10 min, 20, 40... 6 h max) : pas de self.retry en plus de beat.
+    """
+    state = read_spool_backoff()
+    if state["skip"]:
+        write_spool_backoff({**state, "skip": state["skip"] - 1})
+        return f"Rejeu reporté ({state['failures']} échec(s) consécutif(s))"
+
+    try:
+        replayed = replay_spool()
+    except Exception as e:
+        failures = state["failures"] + 1
+        skip = min(2 ** (failures - 1) - 1, SPOOL_MAX_SKIPPED_RUNS)
+        write_spool_backoff({"failures": failures, "skip": skip})
+        print(f"❌ Rejeu impossible ({e}), nouvel essai dans {(skip + 1) * SPOOL_REPLAY_INTERVAL}s.")
+        return f"Erreur : {str(e)}"
+
+    if state["failures"]:
+        write_spool_backoff({"failures": 0, "skip": 0})
+    return f"{replayed} lot(s) rejoué(s)"
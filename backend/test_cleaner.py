@@ -1,5 +1,6 @@
 import pandas as pd
-from src.pipeline.cleaner import process_dataframe
+from src.pipeline.cleaner import clean_text, process_dataframe
+from src.pipeline.dedup import flag_duplicates
 
 def run_test():
     print("🧪 Démarrage du test du module de nettoyage...")
@@ -44,5 +45,54 @@ def run_test():
     assert "Super application !" in df_clean['review_text'].values, "❌ ÉCHEC : Le texte d'Alice n'est pas nettoyé correctement"
     print("✅ TEST RÉUSSI : La logique de nettoyage fonctionne !")
 
+def test_vectorized_matches_clean_text():
+    print("🧪 Nettoyage vectorisé == clean_text...")
+    texts = [
+        "  Bonjour \n\t le   monde  ", "C'est nul. (Translated by Google)",
+        "(Original) Tres bien (Translated by Google)", "A (Original) B", "\u00a0Espace insécable\u2003",
+        None, 42, "", "x", "Déjà  vu 👍 ",
+    ]
+    df = pd.DataFrame({'review_text': texts, 'rating': [5] * len(texts)})
+
+    expected = [clean_text(t) for t in texts]
+    expected = [t for t in expected if len(t) > 1]
+    result = process_dataframe(df)['review_text'].tolist()
+    assert result == expected, f"❌ ÉCHEC : {result} != {expected}"
+
+    # Colonne sans aucun texte
+    empty = process_dataframe(pd.DataFrame({'review_text': [float('nan')] * 3}))
+    assert empty.empty, "❌ ÉCHEC : une colonne sans texte doit donner un DataFrame vide"
+    print("✅ TEST RÉUSSI : même résultat que clean_text.")
+
+def test_flag_duplicates():
+    print("🧪 Détection des doublons...")
+    bug = "L'application plante à chaque ouverture depuis la dernière mise à jour, merci de corriger rapidement"
+    df = pd.DataFrame({
+        'review_id': ['a', 'b', 'c', 'd', 'e', 'f', 'g'],
+        'review_text': [
+            "Super application !",       # a : original
+            "super   APPLICATION",       # b : copie exacte de a (après normalisation)
+            bug,                          # c : original
+            bug.replace("de corriger", "de corriger très"),  # d : quasi-doublon de c (Jaccard >= 0.8)
+            "👍👍",                        # e : emoji seul -> pas d'empreinte
+            bug.replace("de corriger", "de corriger très") + " !!!",  # f : copie exacte de d
+            "Très bonne application pour suivre mes dépenses, simple et claire, je recommande à tous",  # g
+        ],
+    })
+    flagged = flag_duplicates(df).set_index('review_id')
+    references = flagged['duplicate_of'].where(flagged['duplicate_of'].notna(), None).to_dict()
+
+    assert references['a'] is None and references['c'] is None and references['g'] is None, \
+        f"❌ ÉCHEC : les originaux ne doivent pas être signalés ({references})"
+    assert references['b'] == 'a', "❌ ÉCHEC : copie exacte non détectée"
+    assert references['d'] == 'c', "❌ ÉCHEC : quasi-doublon non détecté"
+    assert references['f'] == 'c', "❌ ÉCHEC : la copie d'un quasi-doublon doit pointer vers le premier avis"
+    assert pd.isna(flagged.loc['e', 'content_hash']) and references['e'] is None, \
+        "❌ ÉCHEC : un avis sans texte normalisé (emoji seul) n'a pas d'empreinte"
+    assert flagged.loc['a', 'content_hash'] == flagged.loc['b', 'content_hash'], "❌ ÉCHEC : empreintes différentes"
+    print("✅ TEST RÉUSSI : doublons exacts et quasi-doublons signalés.")
+
 if __name__ == "__main__":
+    test_vectorized_matches_clean_text()
+    test_flag_duplicates()
     run_test()
\ No newline at end of file
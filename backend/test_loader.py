@@ -0,0 +1,76 @@
+import os
+import pandas as pd
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+from src import tasks
+from src.pipeline import loader
+
+@pytest.fixture
+def spool_dir(tmp_path, monkeypatch):
+    # Spool et état du recul dans un dossier temporaire
+    monkeypatch.setattr(loader, "SPOOL_DIR", str(tmp_path))
+    monkeypatch.setattr(tasks, "SPOOL_DIR", str(tmp_path))
+    monkeypatch.setattr(tasks, "SPOOL_BACKOFF_FILE", str(tmp_path / ".backoff.json"))
+    return tmp_path
+
+def _reviews(*review_ids) -> pd.DataFrame:
+    return pd.DataFrame({'review_id': list(review_ids), 'review_text': ["Super"] * len(review_ids), 'rating': 5})
+
+def test_spool_replay(spool_dir, monkeypatch):
+    print("🧪 Lots mis en attente puis rejoués...")
+    loaded = []
+    def load(df, package_name, update_existing=False, spool_on_error=True):
+        assert not spool_on_error, "❌ ÉCHEC : le rejeu ne doit pas remettre le lot en attente"
+        loaded.append((package_name, list(df['review_id']), update_existing))
+        return len(df)
+    monkeypatch.setattr(loader, "load_reviews_to_db", load)
+
+    new = loader.spool_dataframe(_reviews("a", "b"), "com.example")
+    update = loader.spool_dataframe(_reviews("c"), "com.example", update_existing=True)
+    assert loader.replay_spool() == 2, "❌ ÉCHEC : 2 lots à rejouer"
+    assert sorted(loaded) == [("com.example", ["a", "b"], False), ("com.example", ["c"], True)], \
+        f"❌ ÉCHEC : lots rejoués {loaded} (le marqueur update doit être conservé)"
+    assert not os.path.exists(new) and not os.path.exists(update), "❌ ÉCHEC : un lot rejoué doit être supprimé"
+    print("✅ TEST RÉUSSI : lots rejoués avec leur mode, puis supprimés.")
+
+def test_spool_replay_failures(spool_dir, monkeypatch):
+    print("🧪 Rejeu en échec : base indisponible, puis lot rejeté...")
+    path = loader.spool_dataframe(_reviews("a"), "com.example")
+
+    def unavailable(df, package_name, **kwargs):
+        raise OperationalError("INSERT", {}, Exception("connection refused"))
+    monkeypatch.setattr(loader, "load_reviews_to_db", unavailable)
+    with pytest.raises(OperationalError):
+        loader.replay_spool()
+    assert os.path.exists(path), "❌ ÉCHEC : base indisponible, le lot doit rester en attente"
+
+    def rejected(df, package_name, **kwargs):
+        raise IntegrityError("INSERT", {}, Exception("null value in column"))
+    monkeypatch.setattr(loader, "load_reviews_to_db", rejected)
+    assert loader.replay_spool() == 0
+    assert not os.path.exists(path) and os.path.exists(path + ".failed"), \
+        "❌ ÉCHEC : un lot rejeté par la base doit être mis à l'écart en .failed"
+    print("✅ TEST RÉUSSI : lot gardé si la base est indisponible, écarté s'il est rejeté.")
+
+def test_spool_backoff(spool_dir, monkeypatch):
+    print("🧪 Recul du rejeu tant que la base reste indisponible...")
+    def unavailable():
+        raise OperationalError("INSERT", {}, Exception("connection refused"))
+    monkeypatch.setattr(tasks, "replay_spool", unavailable)
+
+    # Échecs consécutifs : 0, 1 puis 3 passages beat sautés
+    runs = []
+    for _ in range(7):
+        result = tasks.task_replay_spool()
+        runs.append("skip" if result.startswith("Rejeu reporté") else "run")
+    assert runs == ["run", "run", "skip", "run", "skip", "skip", "skip"], f"❌ ÉCHEC : passages {runs}"
+    assert tasks.read_spool_backoff() == {"failures": 3, "skip": 0}, f"❌ ÉCHEC : {tasks.read_spool_backoff()}"
+
+    # Base revenue : l'état est remis à zéro
+    monkeypatch.setattr(tasks, "replay_spool", lambda: 1)
+    assert tasks.task_replay_spool() == "1 lot(s) rejoué(s)"
+    assert tasks.read_spool_backoff() == {"failures": 0, "skip": 0}, "❌ ÉCHEC : recul non remis à zéro"
+    print("✅ TEST RÉUSSI : essais espacés, puis reprise normale.")
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
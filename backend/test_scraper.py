@@ -0,0 +1,97 @@
+import pytest
+from datetime import datetime, timedelta
+from src import tasks
+from src.scraper import fixtures, scraper_module
+from src.scraper.scraper_module import PAGE_SIZE, collect_new_reviews, iter_review_pages
+
+@pytest.fixture(autouse=True)
+def synthetic_reviews(monkeypatch):
+    # Hors-ligne : avis synthétiques (5 pages + 1 avis), pages en échec propres à chaque test
+    monkeypatch.setattr(scraper_module, "SCRAPER_MODE", "synthetic")
+    monkeypatch.setattr(fixtures, "SYNTHETIC_REVIEWS", 5 * PAGE_SIZE + 1)
+    monkeypatch.setattr(fixtures, "SYNTHETIC_FAILURES", set())
+
+def test_failing_page_raises():
+    print("🧪 Page en échec pendant un parcours...")
+    fixtures.SYNTHETIC_FAILURES.add(str(2 * PAGE_SIZE))
+    pages = []
+    try:
+        for df, _ in iter_review_pages("com.example", "fr", "fr"):
+            pages.append(df)
+    except ConnectionError:
+        pass
+    else:
+        raise AssertionError("❌ ÉCHEC : une page en échec ne doit pas être prise pour la fin des avis")
+    assert len(pages) == 2, f"❌ ÉCHEC : {len(pages)} page(s) avant l'échec (attendu 2)"
+
+    # Sans échec, le parcours va bien jusqu'à la dernière page (sans jeton suivant)
+    pages = list(iter_review_pages("com.example", "fr", "fr"))
+    assert sum(len(df) for df, _ in pages) == fixtures.SYNTHETIC_REVIEWS and pages[-1][1] is None, \
+        "❌ ÉCHEC : historique incomplet"
+    print("✅ TEST RÉUSSI : l'erreur remonte au lieu de terminer le parcours.")
+
+def test_history_resumes_after_failure(monkeypatch):
+    print("🧪 Historique interrompu puis repris au checkpoint...")
+    checkpoints, loaded = {}, []
+    monkeypatch.setattr(tasks, "get_checkpoint",
+                        lambda app_id, lang, country: checkpoints.get((app_id, lang, country), (None, 0, False)))
+    monkeypatch.setattr(tasks, "save_checkpoint", lambda app_id, lang, country, token, fetched, done=False:
+                        checkpoints.__setitem__((app_id, lang, country), (token, fetched, done)))
+    monkeypatch.setattr(tasks, "load_reviews_to_db", lambda df, package_name: loaded.extend(df['review_id']) or len(df))
+
+    fixtures.SYNTHETIC_FAILURES.add(str(3 * PAGE_SIZE))
+    try:
+        tasks.scrape_locale_history("com.example", "fr", "fr")
+    except ConnectionError:
+        pass
+    else:
+        raise AssertionError("❌ ÉCHEC : l'échec doit remonter (la tâche Celery réessaie)")
+    token, fetched, done = checkpoints[("com.example", "fr", "fr")]
+    assert not done and token == str(3 * PAGE_SIZE) and fetched == 3 * PAGE_SIZE, \
+        f"❌ ÉCHEC : checkpoint {checkpoints} (attendu : reprise à la page 4, historique non terminé)"
+
+    # Nouvel essai : reprise au jeton sauvegardé, jusqu'à la vraie dernière page
+    fetched = tasks.scrape_locale_history("com.example", "fr", "fr")
+    assert fetched == fixtures.SYNTHETIC_REVIEWS and checkpoints[("com.example", "fr", "fr")][2], \
+        f"❌ ÉCHEC : {fetched} avis récupérés (attendu {fixtures.SYNTHETIC_REVIEWS})"
+    assert any(int(review_id.rsplit(':', 1)[1]) >= 3 * PAGE_SIZE for review_id in loaded), \
+        "❌ ÉCHEC : les pages après l'échec ne sont pas en base"
+
+    # Page non enregistrée (mise en attente) : pas de checkpoint, elle sera relue au prochain essai
+    checkpoints.clear()
+    monkeypatch.setattr(tasks, "load_reviews_to_db", lambda df, package_name: None)  # mis en attente
+    with pytest.raises(RuntimeError):
+        tasks.scrape_locale_history("com.example", "fr", "fr")
+    assert not checkpoints, f"❌ ÉCHEC : checkpoint {checkpoints} après un lot non enregistré"
+    print("✅ TEST RÉUSSI : l'historique reprend là où il s'était arrêté.")
+
+def test_incremental_walk_resumes_down_to_cursor():
+    print("🧪 Scraping incrémental interrompu (limite, puis erreur) et repris jusqu'au curseur...")
+    newest = datetime(2025, 1, 1)
+    since = newest - timedelta(minutes=7 * 900)  # avis n°900 : 901 avis plus récents ou égaux
+
+    # 1. Limite atteinte avant le curseur : curseur inchangé, jeton de reprise enregistré
+    df, (cursor, token, pending) = collect_new_reviews("com.example", since=since, max_count=300)
+    seen = set(df['review_id'])
+    assert len(df) == 300 and cursor == since and token is not None and pending == newest, \
+        f"❌ ÉCHEC : curseur {cursor}, jeton {token}, en attente {pending}"
+
+    # 2. Reprise, interrompue par une page en échec : on garde les pages lues et le jeton suivant
+    fixtures.SYNTHETIC_FAILURES.add(str(3 * PAGE_SIZE))
+    df, (cursor, token, pending) = collect_new_reviews("com.example", since=since, max_count=500,
+                                                       resume=(token, pending))
+    seen |= set(df['review_id'])
+    assert cursor == since and token == str(3 * PAGE_SIZE) and pending == newest, \
+        f"❌ ÉCHEC : après l'erreur, curseur {cursor}, jeton {token}"
+
+    # 3. Reprise jusqu'au curseur : il avance enfin, au plus récent avis du parcours
+    while token is not None:
+        df, (cursor, token, pending) = collect_new_reviews("com.example", since=since, max_count=300,
+                                                           resume=(token, pending))
+        seen |= set(df['review_id'])
+    assert cursor == newest and pending is None, f"❌ ÉCHEC : curseur final {cursor}"
+    assert len(seen) == 901, f"❌ ÉCHEC : {len(seen)} avis vus (attendu 901, sans trou)"
+    print("✅ TEST RÉUSSI : aucun avis sauté, le curseur n'avance qu'en fin de parcours.")
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))